@@ -2,17 +2,36 @@
 """
 Loads settings.yaml into typed Pydantic models.
 Import anywhere: from openagent.config import settings
+
+`settings` is resolved lazily (PEP 562 module __getattr__) on first
+access, so importing this package alone does not read or parse YAML.
+
+The validated Settings object is snapshotted to settings.cache.pkl
+next to the YAML. While the snapshot is newer than settings.yaml (and
+was written by the same pydantic version and the same model code in
+this file) startup unpickles it instead of re-parsing YAML and
+re-validating the whole tree.
 """
 
 from __future__ import annotations
+import hashlib
+import logging
+import os
+import pickle
 from pathlib import Path
-from pydantic import BaseModel
-import yaml
+
+import pydantic
+from pydantic import BaseModel, ConfigDict
+
+logger = logging.getLogger("openagent.config")
 
 _CONFIG_PATH = Path(__file__).parent / "settings.yaml"
+_CACHE_PATH = _CONFIG_PATH.with_suffix(".cache.pkl")
 
 
 class LLMConfig(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     provider: str = "ollama"  # Default to ollama
     host: str = "http://localhost:11434"
     base_url: str = "http://localhost:11434"
@@ -28,18 +47,25 @@ class LLMConfig(BaseModel):
 
 
 class OCRConfig(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     language: str
     psm: int
 
 
 class MemoryConfig(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     db_path: str
     collection_name: str
     embedding_model: str
     max_context_chunks: int
+    batch_size: int = 64  # max interactions per background collection.add()
 
 
 class SearchConfig(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     max_results: int
     region: str
     safesearch: str
@@ -47,23 +73,31 @@ class SearchConfig(BaseModel):
 
 
 class SandboxConfig(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     enabled: bool
     allowed_commands: list[str]
     max_execution_seconds: int
 
 
 class NetworkConfig(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     check_host: str
     check_port: int
     check_timeout_seconds: int
 
 
 class LoggingConfig(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     level: str
     file: str
 
 
 class Settings(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     llm: LLMConfig
     ocr: OCRConfig
     memory: MemoryConfig
@@ -74,9 +108,67 @@ class Settings(BaseModel):
 
 
 def _load() -> Settings:
-    with open(_CONFIG_PATH, "r") as f:
-        raw = yaml.safe_load(f)
+    import yaml
+
+    # libyaml-backed loader when PyYAML was built with it (3-10x faster);
+    # the pure-Python SafeLoader otherwise. Same safe-load semantics.
+    try:
+        from yaml import CSafeLoader as Loader
+    except ImportError:  # PyYAML built without libyaml
+        from yaml import SafeLoader as Loader
+
+    raw = yaml.load(_CONFIG_PATH.read_bytes(), Loader=Loader)
+    # Schemas are built lazily (defer_build) — only this YAML path ever
+    # validates, so the pickled fast path never pays schema-build cost.
+    Settings.model_rebuild()
     return Settings(**raw)
 
 
-settings: Settings = _load()
+def _cache_tag() -> tuple[str, str]:
+    """
+    Snapshot version: pydantic version + a digest of this module's source.
+    Editing the models (e.g. a new defaulted field) changes the digest, so
+    an old snapshot can't load into classes it no longer matches.
+    """
+    src = hashlib.blake2b(Path(__file__).read_bytes(), digest_size=16).hexdigest()
+    return pydantic.VERSION, src
+
+
+def _load_cached() -> Settings:
+    """
+    Return Settings from the pickle snapshot when it is still fresh,
+    otherwise parse + validate the YAML and refresh the snapshot.
+    Any cache problem (stale, corrupt, read-only dir) falls back to
+    the plain YAML path — the cache is an optimization, never required.
+    """
+    tag = _cache_tag()
+    try:
+        if _CACHE_PATH.stat().st_mtime >= _CONFIG_PATH.stat().st_mtime:
+            version, cached = pickle.loads(_CACHE_PATH.read_bytes())
+            if version == tag and isinstance(cached, Settings):
+                return cached
+    except Exception:
+        pass  # missing / stale / unreadable snapshot → rebuild below
+
+    s = _load()
+    # Write to a temp file and rename it into place, so a concurrent
+    # startup never reads a half-written snapshot
+    tmp = _CACHE_PATH.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(pickle.dumps((tag, s), protocol=5))
+        os.replace(tmp, _CACHE_PATH)
+    except OSError as e:
+        logger.debug(f"Could not write settings cache {_CACHE_PATH}: {e}")
+        tmp.unlink(missing_ok=True)
+    return s
+
+
+settings: Settings  # bound on first access by __getattr__ below
+
+
+def __getattr__(name: str):
+    if name == "settings":
+        global settings
+        settings = _load_cached()
+        return settings
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
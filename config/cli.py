@@ -15,12 +15,15 @@ Commands:
 from __future__ import annotations
 import sys
 import asyncio
+import collections
+import threading
 from pathlib import Path
 
 # Adjust import path so this works both as module and script
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
 
-from openagent.core.agent import Agent
+from openagent.core.agent import Agent, InterruptedReply
+from openagent.core.llm import Turn
 from openagent.core.network import check_connectivity
 
 
@@ -33,15 +36,77 @@ BANNER = """
 ╚══════════════════════════════════════════════════════════╝
 """
 
+# Static screens encoded once; written below the text layer in one call.
+_BANNER_BYTES = (BANNER + "\n").encode("utf-8")
+_HELP_BYTES = ((__doc__ or "") + "\n").encode("utf-8")
+
+
+def _write_static(data: bytes) -> None:
+    """Write a pre-encoded UTF-8 blob straight to stdout's byte buffer."""
+    out = sys.stdout
+    buf = getattr(out, "buffer", None)
+    if buf is None or (out.encoding or "").lower().replace("-", "") != "utf8":
+        # Redirected/wrapped stream or a non-UTF-8 console: let the text
+        # layer handle encoding.
+        out.write(data.decode("utf-8"))
+        out.flush()
+        return
+    out.flush()  # keep ordering with anything already in the text buffer
+    buf.write(data)
+    buf.flush()
+
+
+def _settle(fut: asyncio.Future, line: str | None, exc: BaseException | None) -> None:
+    if fut.done():
+        return
+    if exc is not None:
+        fut.set_exception(exc)
+    else:
+        fut.set_result(line)
+
+
+async def _ainput(prompt: str) -> str:
+    """
+    input() without blocking the event loop, so background tasks
+    (LLM warmup, connectivity probe) progress while the user types.
+    Reads on a daemon thread rather than the default executor: a
+    pending read must never hold up interpreter exit after Ctrl+C.
+    """
+    loop = asyncio.get_running_loop()
+    fut = loop.create_future()
+
+    def reader() -> None:
+        try:
+            line, exc = input(prompt), None
+        except BaseException as e:  # EOFError / KeyboardInterrupt
+            line, exc = None, e
+        try:
+            loop.call_soon_threadsafe(_settle, fut, line, exc)
+        except RuntimeError:
+            pass  # loop already closed (shutting down)
+
+    threading.Thread(target=reader, name="openagent-input", daemon=True).start()
+    return await fut
+
 
 async def main():
-    print(BANNER)
+    _write_static(_BANNER_BYTES)
+    # Probe the network while the agent loads; /status reuses the result
+    # through check_connectivity()'s TTL cache.
+    connectivity_task = asyncio.create_task(check_connectivity())
     agent = await Agent.create()
-    history: list[dict] = []  # Running conversation context
+    # Warm the LLM (TLS connection / Ollama model load) and the memory
+    # index while the user types the first message
+    warmup_tasks = [
+        asyncio.create_task(agent.llm.warmup()),
+        asyncio.create_task(agent.memory.warmup()),
+    ]
+    # Running conversation context — the deque drops the oldest turns itself
+    history: collections.deque[Turn] = collections.deque(maxlen=40)
 
     while True:
         try:
-            raw = input("\n🧑 You> ").strip()
+            raw = (await _ainput("\n🧑 You> ")).strip()
         except (EOFError, KeyboardInterrupt):
             print("\n👋 Goodbye.")
             break
@@ -58,7 +123,7 @@ async def main():
                 break
 
             elif cmd == "/help":
-                print(__doc__)
+                _write_static(_HELP_BYTES)
                 continue
 
             elif cmd == "/tools":
@@ -66,6 +131,7 @@ async def main():
                 continue
 
             elif cmd == "/status":
+                await connectivity_task  # no-op once the startup probe is done
                 online = await check_connectivity()
                 print(f"  LLM model : {agent.cfg.llm.model}")
                 print(f"  LLM host  : {agent.cfg.llm.host}")
@@ -97,16 +163,27 @@ async def main():
 
         # ── send to agent ─────────────────────────────────────
         print("\n🤖 Agent> ", end="", flush=True)
-        response = await agent.run(raw, history)
-        print(response)
+        # Write tokens as they arrive rather than after the whole reply
+        chunks: list[str] = []
+        async for token in agent.run_stream(raw, history):
+            sys.stdout.write(token)
+            sys.stdout.flush()
+            chunks.append(token)
+        print()
+        if chunks and isinstance(chunks[-1], InterruptedReply):
+            continue  # cut-off reply: keep it out of the conversation context
+        response = "".join(chunks)
+
+        # Store in local history (bounded to the last 20 turns)
+        history.append(Turn("user", raw))
+        history.append(Turn("assistant", response))
 
-        # Store in local history (trimmed to last 20 turns)
-        history.append({"role": "user", "content": raw})
-        history.append({"role": "assistant", "content": response})
-        if len(history) > 40:
-            history = history[-40:]
+    await agent.aclose()
 
 
 def run():
     """Entry point called from __main__.py"""
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n👋 Goodbye.")
@@ -3,22 +3,27 @@
 Agent Core — the central orchestrator.
 
 Flow for every user message:
-  1. Retrieve relevant memory (RAG context injection)
-  2. Route the input → pick the right tool
+  1. Retrieve relevant memory (RAG context injection)  ┐ run
+  2. Route the input → pick the right tool             ┘ concurrently
   3. Execute the tool (or fall back to raw LLM)
   4. Queue the interaction for memory storage (background thread —
      embedding latency never delays the reply)
   5. Return the response
 
 Design decisions:
-  - Memory retrieval happens BEFORE routing so context is always available.
+  - Memory retrieval runs alongside routing and is awaited before any tool
+    executes, so context is always available.
   - Tools are async. The agent awaits each one.
   - If a tool fails, we fall back to the LLM with an error note in the prompt.
 """
 
 from __future__ import annotations
+import asyncio
+import functools
 import logging
-from pathlib import Path
+import re
+import sys
+from typing import AsyncIterator
 
 from openagent.config import settings
 from openagent.core.llm import LLMClient
@@ -26,13 +31,9 @@ from openagent.core.router import route, ToolName
 from openagent.core.network import check_connectivity
 from openagent.memory.store import MemoryStore
 
-# Tool implementations
-from openagent.tools.offline.summarize import summarize_text
-from openagent.tools.offline.run_command import run_sandboxed_command
-from openagent.tools.offline import file_ops
-from openagent.tools.online.web_search import web_search
-from openagent.tools.online.web_fetch import web_fetch
-from openagent.parsers.unified import parse_file
+# Tool implementations are imported inside the handlers that use them:
+# parsers (PyMuPDF, OCR), the sandbox and the web stacks then load on
+# first use instead of on every cold start.
 
 logger = logging.getLogger("openagent.agent")
 
@@ -54,71 +55,306 @@ Context sections such as [PAST MEMORY CONTEXT], [FILE CONTENT], [WEB SEARCH RESU
 
 You were developed by Koushik HY (https://koushikhy.netlify.app). Mention this only when specifically asked about your creator."""
 
+# ── Image analysis prompts ───────────────────────────────────────
+_VISION_PROMPT = (
+    "Analyze this image thoroughly. Describe:\n"
+    "1. All people visible (appearance, estimated age, notable features)\n"
+    "2. Objects, text, logos, or landmarks\n"
+    "3. The scene/setting/background\n"
+    "4. Any text visible in the image\n"
+    "If you recognize any famous person, celebrity, or public figure, "
+    "state their name and why you think it's them."
+)
+
+_SEARCH_EXTRACT_TEMPLATE = (
+    "Based on this image description, extract the single most important "
+    "person name or entity to search for. Reply with ONLY the search query, "
+    "nothing else. If no specific person or entity is identifiable, reply with 'NONE'.\n\n"
+    "Description: {vision_result}"
+)
+_SEARCH_EXTRACT_SYSTEM = "You extract search queries. Reply with only the query text, no explanation."
+
+_SYNTHESIS_SYSTEM = (
+    SYSTEM_PROMPT + "\n\nYou have received an AI vision analysis of an image. "
+    "Present the findings in a clear, organized way. "
+    "If web search results are available, use them to provide additional context "
+    "about identified people, places, or objects. "
+    "Be confident but note if identification is uncertain."
+)
+
+# ── File-ops intent keywords ─────────────────────────────────────
+# keyword → operation. _handle_file_ops still checks operations in its
+# own priority order (list > search > read > fix > write); the regex only
+# replaces the repeated lower()+substring scans with one pass.
+_FILE_OPS_KEYWORDS = {
+    "list files": "list", "project files": "list", "show project": "list",
+    "project structure": "list", "directory": "list",
+    "search in files": "search", "find in code": "search", "grep": "search",
+    "read file": "read", "show code": "read", "open file": "read",
+    "read code": "read", "show file": "read",
+    "fix error": "fix", "fix the error": "fix", "fix bug": "fix",
+    "fix this": "fix", "fix code": "fix",
+    "write file": "write", "edit file": "write", "modify file": "write",
+}
+# Zero-width lookahead so overlapping keywords are all reported.
+_FILE_OPS_RE = re.compile(
+    "(?=(" + "|".join(map(re.escape, _FILE_OPS_KEYWORDS)) + "))", re.IGNORECASE
+)
+
+
+def _file_ops_in(text: str) -> set[str]:
+    """Return the set of file operations whose keywords appear in text."""
+    return {_FILE_OPS_KEYWORDS[m.group(1).lower()] for m in _FILE_OPS_RE.finditer(text)}
+
+
+# ── Simple-query detection ──────────────────────────────────────
+_GREETINGS: frozenset[str] = frozenset({
+    "hi", "hello", "hey", "hii", "hiii", "yo", "sup", "howdy",
+    "good morning", "good evening", "good night", "thanks",
+    "thank you", "bye", "goodbye", "ok", "okay", "yeah",
+    "yes", "no", "sure", "cool", "nice", "great", "awesome",
+})
+_SPECIAL_KWS = ("file", "search", "fetch", "http", "summarize")
+_KW_RE = re.compile("|".join(map(re.escape, _SPECIAL_KWS)))
+
+
+@functools.lru_cache(maxsize=512)
+def _is_simple_query(text: str) -> bool:
+    """Detect simple conversational queries that don't need memory context."""
+    t = text.strip().lower().rstrip("?!.")
+    # Greetings
+    if t in _GREETINGS:
+        return True
+    # Very short queries (< 5 words) that are just conversation;
+    # maxsplit stops splitting once we know it's too long
+    if len(t.split(None, 3)) <= 3 and _KW_RE.search(t) is None:
+        return True
+    return False
+
+
+# ── LLM output cleanup ──────────────────────────────────────────
+# Surrounding whitespace and quotes in one pass (was .strip() three times).
+_CLEAN_RE = re.compile(r"^[\s'\"]+|[\s'\"]+$")
+
+
+def _clean_llm_output(text: str) -> str:
+    """Strip whitespace and quote characters from both ends of an LLM reply."""
+    return _CLEAN_RE.sub("", text)
+
+
+# ── /tools listing (one write instead of eleven print calls) ─────
+_TOOLS_TEXT = (
+    "\n  📦 Available Tools:\n"
+    "  ─────────────────────────────────────────────\n"
+    "  📄 parse_file     → Parse TXT, PDF, DOCX files\n"
+    "  🖼️  ocr_image     → Extract text from images (OCR)\n"
+    "  👁️  analyze_image → Vision AI image analysis\n"
+    "  📝 summarize      → Summarize or analyze text\n"
+    "  💬 general        → General Q&A via local LLM\n"
+    "  🔧 run_command    → Execute sandboxed shell commands\n"
+    "  📂 file_ops       → Read, write, search project files (MCP)\n"
+    "  🌐 web_search     → Search the web (requires internet)\n"
+    "  🔗 web_fetch      → Fetch and read a webpage (requires internet)\n"
+    "  ─────────────────────────────────────────────\n\n"
+)
+
+# ── Prompt context limits (UTF-8 bytes) ─────────────────────────
+# Budgets are in bytes, not characters: byte length tracks token count
+# far better across scripts (≈4 bytes/token for English, one CJK
+# character is 3 bytes and ~1 token). A character budget let 8000 CJK
+# characters through as ~24 KB while over-trimming plain ASCII.
+_FILE_CONTENT_MAX_BYTES = 12_000
+_WEB_CONTENT_MAX_BYTES = 9_000
+_FILE_TRUNCATED = "\n... [content truncated for context limit]"
+_WEB_TRUNCATED = "\n... [page content truncated]"
+
+def _truncate_utf8(text: str, max_bytes: int) -> str | None:
+    """
+    Cut text to at most max_bytes of UTF-8, on a character boundary.
+    Returns None when it already fits, so callers use text as-is.
+    """
+    if len(text) * 4 <= max_bytes:  # fits even if every char is 4 bytes
+        return None
+    if text.isascii():  # 1 byte per char: plain slicing, no encode
+        return text[:max_bytes] if len(text) > max_bytes else None
+    data = text.encode("utf-8")
+    if len(data) <= max_bytes:
+        return None
+    # "ignore" drops a multi-byte character split by the cut
+    return data[:max_bytes].decode("utf-8", "ignore")
+
+
+# ── Prompt section delimiters ───────────────────────────────────
+# Closers carry the blank line that separates sections.
+_MEMORY_OPEN, _MEMORY_CLOSE = "[PAST MEMORY CONTEXT]\n", "\n[END MEMORY]\n\n"
+_FILE_OPEN, _FILE_CLOSE = "[FILE CONTENT]\n", "\n[END FILE]\n\n"
+_SEARCH_OPEN, _SEARCH_CLOSE = "[WEB SEARCH RESULTS]\n", "\n[END SEARCH]\n\n"
+_PAGE_OPEN, _PAGE_CLOSE = "[WEB PAGE CONTENT]\n", "\n[END PAGE]\n\n"
+_QUERY_OPEN = "[USER QUERY]\n"
+
+
+class InterruptedReply(str):
+    """
+    Last chunk of a run_stream() reply that failed after part of it was
+    shown: a visible "response interrupted" notice. Callers display it
+    like any token but must not record the reply as a completed turn.
+    """
+
 
 class Agent:
     def __init__(self, llm: LLMClient, memory: MemoryStore):
         self.llm = llm
         self.memory = memory
         self.cfg = settings
+        # Bound handlers resolved once, so a turn costs one dict lookup
+        self._dispatch = {tool: getattr(self, name) for tool, name in self._DISPATCH.items()}
+
+    async def aclose(self) -> None:
+        """
+        Graceful shutdown: wait for queued background memory writes so
+        the last turns of a session aren't lost.
+        """
+        try:
+            await self.memory.flush()
+        except Exception as e:
+            logger.warning("Memory flush on shutdown failed: %s", e)
 
     @classmethod
     async def create(cls) -> "Agent":
-        """Factory — initializes LLM client and memory store."""
+        """
+        Factory — initializes LLM client and memory store.
+        The memory store (embedding model load) starts first on a worker
+        thread so it overlaps with the rest of startup.
+        """
+        memory_task = asyncio.create_task(MemoryStore.create())
         llm = LLMClient()
-        memory = await MemoryStore.create()
+        memory = await memory_task
         return cls(llm=llm, memory=memory)
 
-    @staticmethod
-    def _is_simple_query(text: str) -> bool:
-        """Detect simple conversational queries that don't need memory context."""
-        t = text.strip().lower().rstrip("?!.")
-        # Greetings
-        if t in ("hi", "hello", "hey", "hii", "hiii", "yo", "sup", "howdy",
-                 "good morning", "good evening", "good night", "thanks",
-                 "thank you", "bye", "goodbye", "ok", "okay", "yeah",
-                 "yes", "no", "sure", "cool", "nice", "great", "awesome"):
-            return True
-        # Very short queries (< 5 words) that are just conversation
-        words = t.split()
-        if len(words) <= 3 and not any(kw in t for kw in ("file", "search", "fetch", "http", "summarize")):
-            return True
-        return False
+    # Module-level (memoized) helper, still reachable as Agent._is_simple_query
+    _is_simple_query = staticmethod(_is_simple_query)
+
+    # Tools whose handlers ignore memory_ctx — no point waiting on retrieval
+    _TOOLS_WITHOUT_MEMORY = frozenset({ToolName.RUN_COMMAND})
+
+    async def _prepare(self, user_input: str) -> tuple[ToolName, dict, str]:
+        """
+        Steps 1+2: retrieve memory context and route, concurrently.
+        Both depend only on user_input, so the embedding lookup overlaps
+        the router instead of adding to it.
+        """
+        # Skip memory for simple conversational queries to avoid confusing small models
+        memory_task = (
+            None if self._is_simple_query(user_input)
+            else asyncio.create_task(self.memory.retrieve(user_input))
+        )
+        try:
+            tool_name, ctx = await route(user_input)
+        except BaseException:
+            if memory_task:
+                memory_task.cancel()
+            raise
+        logger.info("Routed to: %s", tool_name.value)
+        if memory_task and tool_name in self._TOOLS_WITHOUT_MEMORY:
+            # Retrieval was speculative; this tool never reads it
+            memory_task.cancel()
+            return tool_name, ctx, ""
+        memory_context = await memory_task if memory_task else ""
+        return tool_name, ctx, memory_context
 
     async def run(self, user_input: str, history: list[dict] | None = None) -> str:
         """
         Main entry point. Takes user text, returns agent response string.
+        A thin wrapper that joins the run_stream() pipeline for
+        non-streaming callers; since nothing is shown yet, a failure
+        mid-answer falls back to the LLM instead of returning the
+        truncated text.
         """
-        history = history or []
+        return "".join([token async for token in self._respond(user_input, history, streaming=False)])
 
-        # ── Step 1: Retrieve memory context ───────────────────
-        # Skip memory for simple conversational queries to avoid confusing small models
-        if self._is_simple_query(user_input):
-            memory_context = ""
-        else:
-            memory_context = await self.memory.retrieve(user_input)
+    def run_stream(self, user_input: str, history: list[dict] | None = None) -> AsyncIterator[str]:
+        """
+        Streaming entry point: yields the response as it is generated.
+        Tools whose answer is a single LLM call over a prebuilt prompt
+        (general Q&A, summarize, web search) stream token by token; every
+        other tool yields its finished response as one chunk. A failure
+        mid-answer ends the stream with an InterruptedReply chunk.
+        """
+        return self._respond(user_input, history, streaming=True)
 
-        # ── Step 2: Route to a tool ───────────────────────────
-        tool_name, ctx = await route(user_input)
-        logger.info(f"Routed to: {tool_name.value}")
+    async def _respond(self, user_input: str, history: list[dict] | None, streaming: bool) -> AsyncIterator[str]:
+        """Shared body of run() and run_stream()."""
+        history = history or []
+
+        # ── Steps 1+2: Memory context + routing ───────────────
+        tool_name, ctx, memory_context = await self._prepare(user_input)
 
         # ── Step 3: Execute the selected tool ─────────────────
+        builder = (
+            self._STREAM_PROMPTS.get(tool_name) if tool_name in self._DISPATCH
+            else "_general_prompt"
+        )
+        chunks: list[str] = []
         try:
-            response = await self._execute_tool(tool_name, ctx, memory_context, history)
+            if builder:
+                prompt = await getattr(self, builder)(ctx, memory_context)
+                async for token in self.llm.generate_stream(prompt, system=SYSTEM_PROMPT, history=history):
+                    chunks.append(token)
+                    if streaming:
+                        yield token
+            else:
+                chunks.append(await self._execute_tool(tool_name, ctx, memory_context, history))
+                if streaming:
+                    yield chunks[0]
         except Exception as e:
-            logger.error(f"Tool execution failed: {e}")
+            logger.error("Tool execution failed: %s", e)
+            if chunks and streaming:
+                # Part of the answer is already on screen: mark it as cut
+                # off rather than append a second, unrelated answer, and
+                # don't remember a truncated answer either.
+                yield InterruptedReply(f"\n\n⚠️ Response interrupted: {e}")
+                return
             # Fallback: send to LLM with error context
-            response = await self._llm_fallback(user_input, memory_context, history, error=str(e))
+            chunks = [await self._llm_fallback(user_input, memory_context, history, error=str(e))]
+            if streaming:
+                yield chunks[0]
+
+        response = "".join(chunks)
+        if not streaming:
+            yield response
 
         # ── Step 4: Store in memory (background) ──────────────
+        # Only reached when the answer completed: a stream abandoned by
+        # its consumer (aclose() on client disconnect) stops at its
+        # last yield and stores nothing.
         # Fire-and-forget on a plain worker thread: the embedding
-        # latency no longer delays the reply, and the thread survives
+        # latency never delays the reply, and the thread survives
         # per-request `asyncio.run()` loop teardown (an asyncio task
         # would be killed when the loop closes).
         self.memory.store_background(user_input, response)
 
-        return response
-
     # ─── Tool dispatch ──────────────────────────────────────────
+    # ToolName → handler method name; bound into self._dispatch in
+    # __init__. Every handler takes (ctx, memory_ctx, history).
+    _DISPATCH: dict[ToolName, str] = {
+        ToolName.PARSE_FILE: "_tool_parse_file",
+        ToolName.OCR_IMAGE: "_tool_ocr_image",
+        ToolName.ANALYZE_IMAGE: "_tool_analyze_image",
+        ToolName.SUMMARIZE: "_tool_summarize",
+        ToolName.RUN_COMMAND: "_tool_run_command",
+        ToolName.FILE_OPS: "_handle_file_ops",
+        ToolName.WEB_SEARCH: "_tool_web_search",
+        ToolName.WEB_FETCH: "_tool_web_fetch",
+    }
+
+    # Tools that end in one SYSTEM_PROMPT generate() call over a prompt
+    # that can be built up front → prompt-builder name. run_stream()
+    # streams these; anything not routed through _DISPATCH is GENERAL.
+    _STREAM_PROMPTS: dict[ToolName, str] = {
+        ToolName.SUMMARIZE: "_summarize_prompt",
+        ToolName.WEB_SEARCH: "_web_search_prompt",
+    }
+
     async def _execute_tool(
         self,
         tool: ToolName,
@@ -126,137 +362,165 @@ class Agent:
         memory_ctx: str,
         history: list[dict],
     ) -> str:
+        handler = self._dispatch.get(tool, self._tool_general)
+        return await handler(ctx, memory_ctx, history)
+
+    async def _gather_ctx(self, ctx: dict, primary: str) -> dict[str, str]:
+        """
+        Collect every input source present in ctx concurrently: the file
+        (parsed on a worker thread), a URL to fetch, a web search query.
+        Returns a dict keyed like _build_prompt's arguments (file_content,
+        web_content, web_results). A failure of the route's `primary`
+        source propagates (run() falls back to the LLM); failures of
+        secondary sources are logged and the source is left out.
+        """
+        jobs = {}
+        if ctx.get("filepath"):
+            from openagent.parsers.unified import parse_file
+            jobs["file_content"] = asyncio.to_thread(parse_file, ctx["filepath"])
+        if ctx.get("url"):
+            from openagent.tools.online.web_fetch import web_fetch
+            jobs["web_content"] = web_fetch(ctx["url"])
+        if ctx.get("query"):
+            from openagent.tools.online.web_search import web_search
+            jobs["web_results"] = web_search(ctx["query"])
+
+        results = await asyncio.gather(*jobs.values(), return_exceptions=True)
+        gathered = {}
+        for key, result in zip(jobs, results):
+            if isinstance(result, BaseException):
+                if key == primary:
+                    raise result
+                logger.warning("Secondary context source %s failed: %s", key, result)
+                continue
+            gathered[key] = result
+        return gathered
+
+    async def _tool_parse_file(self, ctx: dict, memory_ctx: str, history: list[dict]) -> str:
+        if not ctx.get("filepath"):
+            return "⚠️ No file path provided. Use: /file <path>"
+        # Parse the file (and fetch any URL mentioned alongside it) concurrently
+        got = await self._gather_ctx(ctx, primary="file_content")
+        # After parsing, send to LLM for analysis
+        prompt = self._build_prompt(
+            ctx.get("prompt", "Analyze this file content."),
+            memory_ctx,
+            file_content=got["file_content"],
+            web_content=got.get("web_content", ""),
+        )
+        return await self.llm.generate(prompt, system=SYSTEM_PROMPT, history=history)
 
-        if tool == ToolName.PARSE_FILE:
-            filepath = ctx.get("filepath")
-            if not filepath:
-                return "⚠️ No file path provided. Use: /file <path>"
-            text = parse_file(Path(filepath))
-            # After parsing, send to LLM for analysis
+    async def _tool_ocr_image(self, ctx: dict, memory_ctx: str, history: list[dict]) -> str:
+        from openagent.parsers.unified import parse_file
+
+        filepath = ctx.get("filepath")
+        if filepath:
+            text = await asyncio.to_thread(parse_file, filepath)  # unified parser handles images
             prompt = self._build_prompt(
-                ctx.get("prompt", "Analyze this file content."),
+                ctx.get("prompt", "What does this image contain?"),
                 memory_ctx,
                 file_content=text,
             )
             return await self.llm.generate(prompt, system=SYSTEM_PROMPT, history=history)
+        return "⚠️ No image file provided. Use: /file <path_to_image>"
+
+    async def _tool_analyze_image(self, ctx: dict, memory_ctx: str, history: list[dict]) -> str:
+        from openagent.parsers.unified import parse_file
+        from openagent.tools.online.web_search import web_search
 
-        elif tool == ToolName.OCR_IMAGE:
-            filepath = ctx.get("filepath")
-            if filepath:
-                text = parse_file(Path(filepath))  # unified parser handles images
+        filepath = ctx.get("filepath")
+        if not filepath:
+            return "⚠️ No image file provided for analysis."
+
+        # Step 1: Vision analysis — describe the image
+        vision_result = await self.llm.analyze_image(str(filepath), _VISION_PROMPT)
+        logger.info("Vision result: %.200s...", vision_result)
+
+        # Step 2: If vision failed (offline), fall back to OCR
+        if vision_result.startswith("[VISION_OFFLINE]") or vision_result.startswith("[VISION_ERROR]"):
+            logger.warning("Vision failed, falling back to OCR")
+            try:
+                ocr_text = await asyncio.to_thread(parse_file, filepath)
                 prompt = self._build_prompt(
-                    ctx.get("prompt", "What does this image contain?"),
-                    memory_ctx,
-                    file_content=text,
+                    "Analyze this image. Here is the OCR-extracted text:",
+                    memory_ctx, file_content=ocr_text,
                 )
                 return await self.llm.generate(prompt, system=SYSTEM_PROMPT, history=history)
-            return "⚠️ No image file provided. Use: /file <path_to_image>"
-
-        elif tool == ToolName.ANALYZE_IMAGE:
-            filepath = ctx.get("filepath")
-            if not filepath:
-                return "⚠️ No image file provided for analysis."
-
-            # Step 1: Vision analysis — describe the image
-            vision_prompt = (
-                "Analyze this image thoroughly. Describe:\n"
-                "1. All people visible (appearance, estimated age, notable features)\n"
-                "2. Objects, text, logos, or landmarks\n"
-                "3. The scene/setting/background\n"
-                "4. Any text visible in the image\n"
-                "If you recognize any famous person, celebrity, or public figure, "
-                "state their name and why you think it's them."
-            )
-            vision_result = await self.llm.analyze_image(str(filepath), vision_prompt)
-            logger.info(f"Vision result: {vision_result[:200]}...")
-
-            # Step 2: If vision failed (offline), fall back to OCR
-            if vision_result.startswith("[VISION_OFFLINE]") or vision_result.startswith("[VISION_ERROR]"):
-                logger.warning("Vision failed, falling back to OCR")
-                try:
-                    ocr_text = parse_file(Path(filepath))
-                    prompt = self._build_prompt(
-                        "Analyze this image. Here is the OCR-extracted text:",
-                        memory_ctx, file_content=ocr_text,
-                    )
-                    return await self.llm.generate(prompt, system=SYSTEM_PROMPT, history=history)
-                except Exception:
-                    return f"⚠️ Image analysis unavailable offline and OCR failed.\n\nVision error: {vision_result}"
+            except Exception:
+                return f"⚠️ Image analysis unavailable offline and OCR failed.\n\nVision error: {vision_result}"
 
-            # Step 3: Web search for identified people/entities
-            web_results = ""
-            try:
-                online = await check_connectivity()
-                if online:
-                    # Extract key entities from vision description for search
-                    search_prompt = (
-                        f"Based on this image description, extract the single most important "
-                        f"person name or entity to search for. Reply with ONLY the search query, "
-                        f"nothing else. If no specific person or entity is identifiable, reply with 'NONE'.\n\n"
-                        f"Description: {vision_result}"
-                    )
-                    search_query = await self.llm.generate(search_prompt, system="You extract search queries. Reply with only the query text, no explanation.")
-                    search_query = search_query.strip().strip('"').strip("'")
-
-                    if search_query and search_query.upper() != "NONE" and len(search_query) > 2:
-                        logger.info(f"Auto web-searching for: {search_query}")
-                        web_results = await web_search(search_query)
-            except Exception as e:
-                logger.warning(f"Web search in image analysis failed: {e}")
-
-            # Step 4: Synthesize final response
-            prompt = self._build_prompt(
-                ctx.get("prompt", "Analyze this image completely."),
-                memory_ctx,
-                file_content=f"[IMAGE ANALYSIS BY VISION AI]\n{vision_result}",
-                web_results=web_results,
-            )
-            synthesis_system = (
-                SYSTEM_PROMPT + "\n\nYou have received an AI vision analysis of an image. "
-                "Present the findings in a clear, organized way. "
-                "If web search results are available, use them to provide additional context "
-                "about identified people, places, or objects. "
-                "Be confident but note if identification is uncertain."
-            )
-            return await self.llm.generate(prompt, system=synthesis_system, history=history)
+        # Step 3: Web search for identified people/entities
+        web_results = ""
+        try:
+            online = await check_connectivity()
+            if online:
+                # Extract key entities from vision description for search
+                search_prompt = _SEARCH_EXTRACT_TEMPLATE.format(vision_result=vision_result)
+                search_query = await self.llm.generate(search_prompt, system=_SEARCH_EXTRACT_SYSTEM)
+                search_query = _clean_llm_output(search_query)
+
+                if search_query and search_query.upper() != "NONE" and len(search_query) > 2:
+                    logger.info("Auto web-searching for: %s", search_query)
+                    web_results = await web_search(search_query)
+        except Exception as e:
+            logger.warning("Web search in image analysis failed: %s", e)
+
+        # Step 4: Synthesize final response
+        prompt = self._build_prompt(
+            ctx.get("prompt", "Analyze this image completely."),
+            memory_ctx,
+            file_content=f"[IMAGE ANALYSIS BY VISION AI]\n{vision_result}",
+            web_results=web_results,
+        )
+        return await self.llm.generate(prompt, system=_SYNTHESIS_SYSTEM, history=history)
 
-        elif tool == ToolName.SUMMARIZE:
-            prompt = self._build_prompt(ctx["prompt"], memory_ctx)
-            return await self.llm.generate(prompt, system=SYSTEM_PROMPT, history=history)
+    async def _tool_summarize(self, ctx: dict, memory_ctx: str, history: list[dict]) -> str:
+        prompt = await self._summarize_prompt(ctx, memory_ctx)
+        return await self.llm.generate(prompt, system=SYSTEM_PROMPT, history=history)
 
-        elif tool == ToolName.RUN_COMMAND:
-            return await run_sandboxed_command(ctx["prompt"], self.llm)
+    async def _summarize_prompt(self, ctx: dict, memory_ctx: str) -> str:
+        return self._build_prompt(ctx["prompt"], memory_ctx)
 
-        elif tool == ToolName.FILE_OPS:
-            return await self._handle_file_ops(ctx, memory_ctx, history)
+    async def _tool_run_command(self, ctx: dict, memory_ctx: str, history: list[dict]) -> str:
+        from openagent.tools.offline.run_command import run_sandboxed_command
 
-        elif tool == ToolName.WEB_SEARCH:
-            search_results = await web_search(ctx.get("query", ctx["prompt"]))
-            prompt = self._build_prompt(
-                ctx["prompt"],
-                memory_ctx,
-                web_results=search_results,
-            )
-            return await self.llm.generate(prompt, system=SYSTEM_PROMPT, history=history)
+        return await run_sandboxed_command(ctx["prompt"], self.llm)
 
-        elif tool == ToolName.WEB_FETCH:
-            url = ctx.get("url")
-            if not url:
-                return "⚠️ No URL found. Include a full URL (https://...) in your message."
-            page_text = await web_fetch(url)
-            prompt = self._build_prompt(
-                ctx["prompt"],
-                memory_ctx,
-                web_content=page_text,
-            )
-            return await self.llm.generate(prompt, system=SYSTEM_PROMPT, history=history)
+    async def _tool_web_search(self, ctx: dict, memory_ctx: str, history: list[dict]) -> str:
+        prompt = await self._web_search_prompt(ctx, memory_ctx)
+        return await self.llm.generate(prompt, system=SYSTEM_PROMPT, history=history)
 
-        else:  # GENERAL
-            offline_warning = ctx.get("offline_warning", "")
-            prompt = self._build_prompt(ctx["prompt"], memory_ctx)
-            if offline_warning:
-                prompt = f"[NOTE: {offline_warning}]\n\n" + prompt
-            return await self.llm.generate(prompt, system=SYSTEM_PROMPT, history=history)
+    async def _web_search_prompt(self, ctx: dict, memory_ctx: str) -> str:
+        got = await self._gather_ctx(
+            {**ctx, "query": ctx.get("query", ctx["prompt"])}, primary="web_results"
+        )
+        return self._build_prompt(
+            ctx["prompt"],
+            memory_ctx,
+            web_results=got["web_results"],
+        )
+
+    async def _tool_web_fetch(self, ctx: dict, memory_ctx: str, history: list[dict]) -> str:
+        if not ctx.get("url"):
+            return "⚠️ No URL found. Include a full URL (https://...) in your message."
+        got = await self._gather_ctx(ctx, primary="web_content")
+        prompt = self._build_prompt(
+            ctx["prompt"],
+            memory_ctx,
+            web_content=got["web_content"],
+        )
+        return await self.llm.generate(prompt, system=SYSTEM_PROMPT, history=history)
+
+    async def _tool_general(self, ctx: dict, memory_ctx: str, history: list[dict]) -> str:
+        prompt = await self._general_prompt(ctx, memory_ctx)
+        return await self.llm.generate(prompt, system=SYSTEM_PROMPT, history=history)
+
+    async def _general_prompt(self, ctx: dict, memory_ctx: str) -> str:
+        offline_warning = ctx.get("offline_warning", "")
+        prompt = self._build_prompt(ctx["prompt"], memory_ctx)
+        if offline_warning:
+            prompt = f"[NOTE: {offline_warning}]\n\n" + prompt
+        return prompt
 
     # ─── Prompt construction ────────────────────────────────────
     @staticmethod
@@ -271,41 +535,47 @@ class Agent:
         Assembles the full prompt with all available context.
         Context sections are clearly labeled so the LLM knows what's what.
         """
+        # Flat list of fragments joined once: no per-section f-string and,
+        # when truncating, no intermediate "slice + marker" string.
         parts: list[str] = []
 
         if memory_ctx:
-            parts.append(f"[PAST MEMORY CONTEXT]\n{memory_ctx}\n[END MEMORY]")
+            parts += (_MEMORY_OPEN, memory_ctx, _MEMORY_CLOSE)
 
         if file_content:
-            # Truncate very large files to avoid blowing the context window
-            truncated = file_content[:8000]
-            if len(file_content) > 8000:
-                truncated += "\n... [content truncated for context limit]"
-            parts.append(f"[FILE CONTENT]\n{truncated}\n[END FILE]")
+            # Truncate very large files to avoid blowing the context window.
+            cut = _truncate_utf8(file_content, _FILE_CONTENT_MAX_BYTES)
+            if cut is not None:
+                parts += (_FILE_OPEN, cut, _FILE_TRUNCATED, _FILE_CLOSE)
+            else:
+                parts += (_FILE_OPEN, file_content, _FILE_CLOSE)
 
         if web_results:
-            parts.append(f"[WEB SEARCH RESULTS]\n{web_results}\n[END SEARCH]")
+            parts += (_SEARCH_OPEN, web_results, _SEARCH_CLOSE)
 
         if web_content:
-            truncated = web_content[:6000]
-            if len(web_content) > 6000:
-                truncated += "\n... [page content truncated]"
-            parts.append(f"[WEB PAGE CONTENT]\n{truncated}\n[END PAGE]")
+            cut = _truncate_utf8(web_content, _WEB_CONTENT_MAX_BYTES)
+            if cut is not None:
+                parts += (_PAGE_OPEN, cut, _WEB_TRUNCATED, _PAGE_CLOSE)
+            else:
+                parts += (_PAGE_OPEN, web_content, _PAGE_CLOSE)
 
-        parts.append(f"[USER QUERY]\n{user_query}")
+        parts += (_QUERY_OPEN, user_query)
 
-        return "\n\n".join(parts)
+        return "".join(parts)
 
     # ─── File Operations (MCP) ──────────────────────────────────
     async def _handle_file_ops(self, ctx: dict, memory_ctx: str, history: list[dict] | None = None) -> str:
         """Handle file read/write/list/search/fix operations."""
+        from openagent.tools.offline import file_ops
+
         user_prompt = ctx.get("prompt", "")
         detected_path = ctx.get("detected_path", "")
-        text_lower = user_prompt.lower()
+        ops = _file_ops_in(user_prompt)
 
         # If router detected a raw file path, read it directly
         if detected_path:
-            result = file_ops.read_file(detected_path)
+            result = await asyncio.to_thread(file_ops.read_file, detected_path)
             if result.startswith("⚠️"):
                 return result  # Return error directly
 
@@ -325,11 +595,11 @@ class Agent:
         # For non-read operations, check project path
         if not file_ops.get_project_path():
             # Check if they're trying to read with keywords
-            if any(kw in text_lower for kw in ("read file", "show code", "open file", "read code", "show file")):
+            if "read" in ops:
                 # Extract path from the prompt
                 extracted = file_ops.extract_path_from_text(user_prompt)
                 if extracted:
-                    result = file_ops.read_file(extracted)
+                    result = await asyncio.to_thread(file_ops.read_file, extracted)
                     prompt = self._build_prompt(user_prompt, memory_ctx, file_content=result)
                     return await self.llm.generate(prompt, system=SYSTEM_PROMPT, history=history)
             return (
@@ -340,36 +610,36 @@ class Agent:
             )
 
         # Determine operation type
-        if any(kw in text_lower for kw in ("list files", "project files", "show project", "project structure", "directory")):
+        if "list" in ops:
             # List files
             result = file_ops.list_files()
             return result
 
-        elif any(kw in text_lower for kw in ("search in files", "find in code", "grep")):
+        elif "search" in ops:
             # Search — extract query from user prompt
             extract_system = "Extract the search query from the user's message. Reply with ONLY the search term, nothing else."
             query = await self.llm.generate(user_prompt, system=extract_system)
-            query = query.strip().strip('"').strip("'")
+            query = _clean_llm_output(query)
             if len(query) < 2:
                 return "⚠️ Could not determine what to search for. Try: 'search in files: <query>'"
             result = file_ops.search_in_files(query)
             return result
 
-        elif any(kw in text_lower for kw in ("read file", "show code", "open file", "read code", "show file")):
+        elif "read" in ops:
             # Read — extract filepath
             extract_system = "Extract the file path from the user's message. Reply with ONLY the file path, nothing else. If no specific path is mentioned, reply 'NONE'."
             filepath = await self.llm.generate(user_prompt, system=extract_system)
-            filepath = filepath.strip().strip('"').strip("'")
+            filepath = _clean_llm_output(filepath)
             if not filepath or filepath.upper() == "NONE":
                 return "⚠️ Please specify a file path. Example: `read file main.py`"
-            result = file_ops.read_file(filepath)
+            result = await asyncio.to_thread(file_ops.read_file, filepath)
             return result
 
-        elif any(kw in text_lower for kw in ("fix error", "fix the error", "fix bug", "fix this", "fix code")):
+        elif "fix" in ops:
             # Fix — intelligent error fixing pipeline
             return await self._fix_code(user_prompt, memory_ctx, history)
 
-        elif any(kw in text_lower for kw in ("write file", "edit file", "modify file")):
+        elif "write" in ops:
             return (
                 "✍️ To write/edit files, I need the specific changes. "
                 "Try:\n- `fix error in <file>` — I'll read, fix, and write it back\n"
@@ -387,16 +657,16 @@ class Agent:
 
     async def _fix_code(self, user_prompt: str, memory_ctx: str, history: list[dict] | None = None) -> str:
         """Read project files, identify the error, and fix it."""
-        import json as _json
+        from openagent.tools.offline import file_ops
 
         # Step 1: Try to extract the specific file from the prompt
         extract_system = "Extract the file path from the user's message. Reply with ONLY the file path, nothing else. If no specific file is mentioned, reply 'NONE'."
         filepath = await self.llm.generate(user_prompt, system=extract_system)
-        filepath = filepath.strip().strip('"').strip("'")
+        filepath = _clean_llm_output(filepath)
 
         if filepath and filepath.upper() != "NONE":
             # Fix a specific file
-            content = file_ops.read_file(filepath)
+            content = await asyncio.to_thread(file_ops.read_file, filepath)
             if content.startswith("⚠️") or content.startswith("🚫"):
                 return content
 
@@ -436,15 +706,5 @@ class Agent:
 
     # ─── Utility ────────────────────────────────────────────────
     def print_tools(self):
-        print("\n  📦 Available Tools:")
-        print("  ─────────────────────────────────────────────")
-        print("  📄 parse_file     → Parse TXT, PDF, DOCX files")
-        print("  🖼️  ocr_image     → Extract text from images (OCR)")
-        print("  👁️  analyze_image → Vision AI image analysis")
-        print("  📝 summarize      → Summarize or analyze text")
-        print("  💬 general        → General Q&A via local LLM")
-        print("  🔧 run_command    → Execute sandboxed shell commands")
-        print("  📂 file_ops       → Read, write, search project files (MCP)")
-        print("  🌐 web_search     → Search the web (requires internet)")
-        print("  🔗 web_fetch      → Fetch and read a webpage (requires internet)")
-        print("  ─────────────────────────────────────────────\n")
+        sys.stdout.write(_TOOLS_TEXT)
+        sys.stdout.flush()
@@ -18,12 +18,18 @@ from __future__ import annotations
 import json
 import logging
 import asyncio
-import base64
+import functools
+import io
+import itertools
 import socket
 import os
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator
 import requests
+from urllib3.util.retry import Retry
 
 from openagent.config import settings
 
@@ -41,48 +47,230 @@ logger = logging.getLogger("openagent.llm")
 # the session keeps TCP/TLS connections alive between calls, which
 # saves a full TLS handshake per request against the same host.
 # requests.Session is safe for concurrent use across threads.
+# Gateway errors (502/503/504) and refused/failed connects are usually
+# transient, so the adapter retries them twice with a short backoff.
+# Read timeouts are never retried: the server may still be generating,
+# and a timeout must reach the caller quickly so it can fall back.
+# Other statuses are returned to the caller untouched.
 _session = requests.Session()
-_adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8)
+_adapter = requests.adapters.HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=2,
+        connect=2,
+        read=False,  # re-raise as-is → requests.Timeout, not ConnectionError
+        status=2,
+        backoff_factor=0.2,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    ),
+)
 _session.mount("https://", _adapter)
 _session.mount("http://", _adapter)
 
+# Dedicated worker pool for blocking LLM calls (HTTP, image encoding,
+# stream pumps), so they neither queue behind nor starve unrelated
+# work on the event loop's default executor. A stream holds its worker
+# until the last token, hence a few more workers than CPU-bound needs.
+_LLM_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="openagent-llm")
+
+# ── JSON codec ──────────────────────────────────────────────────
+# Chat payloads carry the whole history and the stream parser decodes
+# one JSON object per token, so use orjson when it is installed and
+# fall back to the stdlib otherwise. Both accept str or bytes, so
+# responses are parsed straight from resp.content (no resp.text copy),
+# and orjson.JSONDecodeError subclasses json.JSONDecodeError.
+try:
+    import orjson
+
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:  # optional speedup
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    _json_loads = json.loads
+
 # ── Connectivity check with TTL cache ───────────────────────────
 # This used to open a raw socket before EVERY generate/stream call.
-# Cache the result (success AND failure) for a short window on a
-# monotonic clock so bursts of requests pay for a single probe.
+# Cache the result for a short window on a monotonic clock so bursts of
+# requests pay for a single probe. An offline result expires sooner, so
+# the cloud provider is picked up again shortly after the network
+# returns instead of routing to Ollama for a full window.
 _NET_CHECK_TTL_SECONDS = 30.0
+_NET_CHECK_OFFLINE_TTL_SECONDS = 5.0
 _net_check_lock = threading.Lock()
+# Held while probing: concurrent callers that miss the cache wait for
+# the one in-flight probe instead of each opening a socket
+_net_probe_lock = threading.Lock()
 _net_check_cached: bool | None = None
 _net_check_at: float = 0.0
 
 
+def _net_check_fresh() -> bool | None:
+    """Cached result if still within its TTL, else None."""
+    with _net_check_lock:
+        if _net_check_cached is None:
+            return None
+        ttl = _NET_CHECK_TTL_SECONDS if _net_check_cached else _NET_CHECK_OFFLINE_TTL_SECONDS
+        if time.monotonic() - _net_check_at < ttl:
+            return _net_check_cached
+        return None
+
+
 def _quick_net_check(force: bool = False) -> bool:
-    """Fast connectivity check (2 second timeout), cached ~30 seconds.
+    """Fast connectivity check (2 second timeout), cached ~30 s online / ~5 s offline.
 
     Pass force=True to bypass the cache and probe immediately.
     """
     global _net_check_cached, _net_check_at
-    with _net_check_lock:
-        if (
-            not force
-            and _net_check_cached is not None
-            and time.monotonic() - _net_check_at < _NET_CHECK_TTL_SECONDS
-        ):
-            return _net_check_cached
-    try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(2)
-        sock.connect(("1.1.1.1", 443))
-        sock.close()
-        result = True
-    except Exception:
-        result = False
-    with _net_check_lock:
-        _net_check_cached = result
-        _net_check_at = time.monotonic()
+    if not force:
+        cached = _net_check_fresh()
+        if cached is not None:
+            return cached
+    with _net_probe_lock:
+        if not force:
+            # Another thread may have probed while we waited
+            cached = _net_check_fresh()
+            if cached is not None:
+                return cached
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.settimeout(2)
+            sock.connect(("1.1.1.1", 443))
+            sock.close()
+            result = True
+        except Exception:
+            result = False
+        with _net_check_lock:
+            _net_check_cached = result
+            _net_check_at = time.monotonic()
     return result
 
 
+# ── Ollama (local fallback) ─────────────────────────────────────
+# Use a simpler system prompt for local models — they get confused by
+# complex ones. A module constant, so every call sends the identical
+# prefix and Ollama can reuse its prompt cache instead of re-ingesting it.
+_OLLAMA_SYSTEM = (
+    "You are OpenAgent, a helpful AI assistant. "
+    "Answer the user's question directly and concisely. "
+    "Do not make up conversations or reference past context unless asked. "
+    "For greetings, just greet back briefly."
+)
+# How long Ollama keeps the model (and its cache) loaded after a request
+_OLLAMA_KEEP_ALIVE = "30m"
+
+# ── Image → data: URL ───────────────────────────────────────────
+# Read size, multiple of 3 so per-chunk base64 output concatenates
+# without padding in the middle.
+_B64_CHUNK = 3 * 256 * 1024
+# pybase64 (SIMD) is a drop-in for the stdlib encoder when installed
+try:
+    from pybase64 import b64encode as _b64encode
+except ImportError:  # optional speedup
+    from base64 import b64encode as _b64encode
+
+
+# Vision models downscale to ~1568px on the longest side anyway, so
+# bigger or heavier images are shrunk and sent as JPEG instead
+_VISION_MAX_SIDE = 1568
+_VISION_REENCODE_BYTES = 2_000_000
+
+
+def _shrink_image(image_path: str, size: int) -> bytes | None:
+    """
+    JPEG re-encode of an oversized image, or None to upload the file
+    as-is (small enough, Pillow missing, or not decodable).
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None
+    try:
+        with Image.open(image_path) as im:  # lazy: reads only the header here
+            if size <= _VISION_REENCODE_BYTES and max(im.size) <= _VISION_MAX_SIDE:
+                return None
+            # JPEG output drops EXIF, so apply its rotation to the pixels
+            # first (phone photos are often stored sideways + Orientation)
+            im = ImageOps.exif_transpose(im)
+            im.thumbnail((_VISION_MAX_SIDE, _VISION_MAX_SIDE))
+            if im.mode in ("RGBA", "LA", "PA") or "transparency" in im.info:
+                # JPEG has no alpha: put transparent areas on white, not black
+                rgba = im.convert("RGBA")
+                im = Image.new("RGB", rgba.size, "white")
+                im.paste(rgba, mask=rgba.getchannel("A"))
+            elif im.mode != "RGB":
+                im = im.convert("RGB")
+            buf = io.BytesIO()
+            im.save(buf, "JPEG", quality=85, optimize=True)
+    except Exception as e:
+        logger.debug(f"Image re-encode skipped for {image_path}: {e}")
+        return None
+    data = buf.getvalue()
+    return data if len(data) < size else None
+
+
+def _image_data_url(image_path: str, mime_type: str) -> str:
+    """
+    Build the "data:<mime>;base64,..." URL for an image file.
+    Follow-up questions about the same (unchanged) image reuse the
+    encoded URL; editing the file changes mtime/size and so the cache key.
+    """
+    st = os.stat(image_path)
+    return _encode_image_data_url(image_path, st.st_mtime_ns, st.st_size, mime_type)
+
+
+# Data URLs are large (4/3 of the image), so keep only a few
+@functools.lru_cache(maxsize=8)
+def _encode_image_data_url(image_path: str, mtime_ns: int, size: int, mime_type: str) -> str:
+    """
+    Oversized images go through _shrink_image(); everything else is
+    encoded chunk by chunk into one buffer pre-sized from the file size,
+    so the whole raw file, a separate base64 copy and the f-string
+    concatenation copy are never all alive at once.
+    """
+    shrunk = _shrink_image(image_path, size)
+    if shrunk is not None:
+        return "data:image/jpeg;base64," + _b64encode(shrunk).decode("ascii")
+
+    prefix = f"data:{mime_type};base64,".encode("ascii")
+    out = bytearray(len(prefix) + (size + 2) // 3 * 4)
+    out[:len(prefix)] = prefix
+    pos = len(prefix)
+    with open(image_path, "rb") as f:
+        while chunk := f.read(_B64_CHUNK):
+            encoded = _b64encode(chunk)
+            end = pos + len(encoded)
+            out[pos:end] = encoded  # grows the buffer if the file grew meanwhile
+            pos = end
+    if pos != len(out):
+        del out[pos:]
+    return out.decode("ascii")
+
+
+# Marks the end of a generate_stream() token queue.
+_STREAM_END = object()
+
+# Providers served through the OpenAI-compatible cloud API
+_CLOUD_PROVIDERS = frozenset({"deepseek", "openrouter", "groq"})
+# Sent with every cloud request; Referer/X-Title are optional, for OpenRouter
+_CLOUD_HEADERS = {
+    "Content-Type": "application/json",
+    "HTTP-Referer": "http://localhost:5000",
+    "X-Title": "OpenAgent",
+}
+
+
+@dataclass(slots=True, frozen=True)
+class Turn:
+    """One conversation message. Slotted: no per-turn __dict__."""
+    role: str
+    content: str
+
+
 class LLMClient:
     """
     Synchronous Ollama client wrapped in an async-friendly executor call.
@@ -95,32 +283,53 @@ class LLMClient:
     HISTORY_MAX_CHARS = 4000    # per-message cap so one huge answer can't blow the context
 
     @classmethod
-    def _history_messages(cls, history: list[dict] | None) -> list[dict]:
+    def _history_messages(cls, history: list[Turn | dict] | None, messages: list[dict] | None = None) -> list[dict]:
         """Normalize recent conversation turns into OpenAI-style messages.
 
         Shared by the cloud (messages array) and Ollama (inline text)
-        paths so both providers see the same multi-turn context.
+        paths so both providers see the same multi-turn context. Accepts
+        Turn records or legacy {"role", "content"} dicts; dicts are only
+        built here, at the API boundary. Appends to `messages` when given.
         """
-        messages: list[dict] = []
+        if messages is None:
+            messages = []
         if not history:
             return messages
-        for msg in history[-cls.HISTORY_MAX_MESSAGES:]:
-            role = msg.get("role", "user")
-            content = (msg.get("content") or "").strip()
+        # islice rather than [-N:] so bounded deques work as well as lists
+        start = max(0, len(history) - cls.HISTORY_MAX_MESSAGES)
+        for msg in itertools.islice(history, start, None):
+            if isinstance(msg, Turn):
+                role, content = msg.role, msg.content.strip()
+            else:
+                role = msg.get("role", "user")
+                content = (msg.get("content") or "").strip()
             if role in ("user", "assistant") and content:
                 messages.append({"role": role, "content": content[:cls.HISTORY_MAX_CHARS]})
         return messages
 
+    @classmethod
+    def _build_messages(cls, prompt: str, system: str | None, history: list[Turn | dict] | None) -> list[dict]:
+        """System prompt + recent turns (as real role messages) + the prompt, in one list."""
+        messages: list[dict] = [{"role": "system", "content": system}] if system else []
+        cls._history_messages(history, messages)
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
     def __init__(self):
         self.cfg = settings.llm
         self.provider = getattr(self.cfg, "provider", "ollama")
+        # Fixed for the client's lifetime — checked once here, not per call
+        self._is_cloud = self.provider in _CLOUD_PROVIDERS
         # OpenRouter / DeepSeek Configuration
-        if self.provider in ["deepseek", "openrouter", "groq"]:
+        if self._is_cloud:
             self.base_url = getattr(self.cfg, "base_url", "https://openrouter.ai/api/v1")
             
             # Security: Prioritize environment variable over config file
             env_key = os.environ.get("GROQ_API_KEY") or os.environ.get("OPENROUTER_API_KEY")
             self.api_key = env_key or getattr(self.cfg, "api_key", "")
+            # Built once; the shared session also talks to Ollama, so the
+            # key is passed per request rather than set on the session
+            self._headers = {**_CLOUD_HEADERS, "Authorization": f"Bearer {self.api_key}"}
             
             # Use 'cloud_model' if available, else fall back to 'model'
             self.model = getattr(self.cfg, "cloud_model", self.cfg.model)
@@ -134,36 +343,116 @@ class LLMClient:
         Runs the blocking HTTP call in a thread pool so we don't freeze
         the async event loop.
         """
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None, self._do_generate, prompt, system, history
-        )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_LLM_EXECUTOR, self._do_generate, prompt, system, history)
+
+    async def generate_stream(self, prompt: str, system: str | None = None, history: list[dict] | None = None) -> AsyncIterator[str]:
+        """
+        Async counterpart of stream_generate(): yields tokens as they
+        arrive. The blocking HTTP stream is drained on a worker thread and
+        handed to the event loop through a queue, so the loop is never
+        blocked between tokens.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def put(item) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                stop.set()  # loop closed — consumer is gone
+
+        def pump() -> None:
+            try:
+                for token in self.stream_generate(prompt, system, history):
+                    if stop.is_set():
+                        break
+                    put(token)
+            except Exception as e:
+                put(e)
+            finally:
+                put(_STREAM_END)
+
+        loop.run_in_executor(_LLM_EXECUTOR, pump)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()  # consumer stopped early → worker exits at next token
+
+    async def warmup(self) -> None:
+        """
+        Prime the provider before the first real turn: opens the pooled
+        HTTPS connection to the cloud API, or asks Ollama to load the
+        model and keep it resident. Best-effort — failures are ignored.
+        Runs on a daemon thread rather than _LLM_EXECUTOR: the model load
+        can take the full timeout, and quitting meanwhile must not wait
+        for it at interpreter exit.
+        """
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+
+        def run() -> None:
+            self._do_warmup()
+            try:
+                loop.call_soon_threadsafe(lambda: done.done() or done.set_result(None))
+            except RuntimeError:
+                pass  # loop already closed (shutting down)
+
+        threading.Thread(target=run, name="openagent-llm-warmup", daemon=True).start()
+        await done
+
+    def _do_warmup(self) -> None:
+        """Blocking body of warmup()."""
+        try:
+            if self._is_cloud:
+                if _quick_net_check():
+                    self.is_available()  # GET /models over the shared session
+                return
+            # An empty prompt makes Ollama load the model without generating
+            _session.post(
+                f"{self.base_url}/api/generate",
+                json={"model": self.model, "prompt": "", "keep_alive": _OLLAMA_KEEP_ALIVE},
+                timeout=self.cfg.timeout_seconds,
+            )
+        except Exception as e:
+            logger.debug(f"LLM warmup failed (ignored): {e}")
 
     async def analyze_image(self, image_path: str, prompt: str = "Describe this image in detail.") -> str:
         """
         Send an image to Groq's vision model for analysis.
         Returns a description of the image contents (people, objects, scene, text).
         """
-        import os
         if not os.path.exists(image_path):
             return f"⚠️ Image file not found: {image_path}"
 
-        # Read and base64-encode the image
-        with open(image_path, "rb") as f:
-            image_data = base64.b64encode(f.read()).decode("utf-8")
-
         # Detect MIME type
         ext = os.path.splitext(image_path)[1].lower()
         mime_map = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg",
                     ".bmp": "image/bmp", ".tiff": "image/tiff", ".gif": "image/gif"}
         mime_type = mime_map.get(ext, "image/jpeg")
 
-        loop = asyncio.get_event_loop()
+        # File read + base64 encode run on the worker thread with the request
+        loop = asyncio.get_running_loop()
         return await loop.run_in_executor(
-            None, self._call_vision_api, image_data, mime_type, prompt
+            _LLM_EXECUTOR, self._analyze_image_sync, image_path, mime_type, prompt
         )
 
-    def _call_vision_api(self, image_base64: str, mime_type: str, prompt: str) -> str:
+    def _analyze_image_sync(self, image_path: str, mime_type: str, prompt: str) -> str:
+        """Blocking body of analyze_image()."""
+        try:
+            data_url = _image_data_url(image_path, mime_type)
+        except OSError as e:
+            return f"[VISION_ERROR] Could not read image: {e}"
+        return self._call_vision_api(data_url, prompt)
+
+    def _call_vision_api(self, data_url: str, prompt: str) -> str:
         """Blocking call to Groq's vision-capable model."""
         if not _quick_net_check():
             return "[VISION_OFFLINE] No internet — cannot analyze image with vision model."
@@ -176,17 +465,10 @@ class LLMClient:
         messages = [
             {"role": "user", "content": [
                 {"type": "text", "text": prompt},
-                {"type": "image_url", "image_url": {
-                    "url": f"data:{mime_type};base64,{image_base64}"
-                }}
+                {"type": "image_url", "image_url": {"url": data_url}}
             ]}
         ]
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-
         payload = {
             "model": vision_model,
             "messages": messages,
@@ -197,10 +479,9 @@ class LLMClient:
         logger.info(f"Vision API call → model={vision_model}")
 
         try:
-            resp = _session.post(url, json=payload, headers=headers, timeout=30)
+            resp = _session.post(url, data=_json_dumps(payload), headers=self._headers, timeout=30)
             resp.raise_for_status()
-            resp.encoding = "utf-8"
-            data = resp.json()
+            data = _json_loads(resp.content)
             return data["choices"][0]["message"]["content"].strip()
         except Exception as e:
             logger.error(f"Vision API error: {e}")
@@ -209,7 +490,7 @@ class LLMClient:
     def _do_generate(self, prompt: str, system: str | None, history: list[dict] | None = None) -> str:
         """blocking HTTP call to LLM provider (Ollama or Cloud)."""
         
-        if self.provider in ["deepseek", "openrouter", "groq"]:
+        if self._is_cloud:
             # Quick connectivity check — skip cloud if offline (avoids 60s timeout)
             if not _quick_net_check():
                 logger.warning("📡 No internet detected — using local Ollama directly")
@@ -226,23 +507,7 @@ class LLMClient:
     def _call_cloud_openai(self, prompt: str, system: str | None, history: list[dict] | None = None) -> str:
         """Call Groq/OpenRouter/DeepSeek API (OpenAI compatible)."""
         url = f"{self.base_url.rstrip('/')}/chat/completions"
-        
-        messages = []
-        if system:
-            messages.append({"role": "system", "content": system})
-
-        # Include recent conversation turns as real role messages
-        messages.extend(self._history_messages(history))
-
-        messages.append({"role": "user", "content": prompt})
-
-        # Ensure we send the headers for OpenRouter
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "http://localhost:5000", # Optional for OpenRouter
-            "X-Title": "OpenAgent",                  # Optional for OpenRouter
-        }
+        messages = self._build_messages(prompt, system, history)
 
         payload = {
             "model": self.model,
@@ -255,11 +520,10 @@ class LLMClient:
         logger.info(f"Cloud call ({self.provider}) → model={self.model}, prompt_len={len(prompt)}")
 
         resp = _session.post(
-            url, json=payload, headers=headers, timeout=self.cfg.timeout_seconds
+            url, data=_json_dumps(payload), headers=self._headers, timeout=self.cfg.timeout_seconds
         )
         resp.raise_for_status()
-        resp.encoding = "utf-8"
-        data = resp.json()
+        data = _json_loads(resp.content)
 
         # Handle different response structures if needed, but usually standard
         try:
@@ -274,14 +538,6 @@ class LLMClient:
         local_host = getattr(self.cfg, "host", "http://localhost:11434")
         local_model = getattr(self.cfg, "model", "phi3:mini")
 
-        # Use a simpler system prompt for local models — they get confused by complex ones
-        simple_system = (
-            "You are OpenAgent, a helpful AI assistant. "
-            "Answer the user's question directly and concisely. "
-            "Do not make up conversations or reference past context unless asked. "
-            "For greetings, just greet back briefly."
-        )
-
         # /api/generate has no messages array, so replay a few recent
         # turns as labelled text ahead of the prompt. Kept short (last
         # 10 messages, tighter per-message cap) — small local models
@@ -304,8 +560,11 @@ class LLMClient:
                 "num_predict": 512,  # Cap output length to prevent rambling
             },
             "stream": False,
+            # Constant system prompt + resident model: Ollama reuses the
+            # KV cache for the unchanged prompt prefix across turns
+            "system": _OLLAMA_SYSTEM,
+            "keep_alive": _OLLAMA_KEEP_ALIVE,
         }
-        payload["system"] = simple_system
 
         logger.info(f"Ollama call → model={local_model}, prompt_len={len(prompt)}")
 
@@ -314,8 +573,7 @@ class LLMClient:
                 url, json=payload, timeout=self.cfg.timeout_seconds
             )
             resp.raise_for_status()
-            resp.encoding = "utf-8"
-            data = resp.json()
+            data = _json_loads(resp.content)
             return data.get("response", "").strip()
 
         except requests.exceptions.ConnectionError:
@@ -343,7 +601,7 @@ class LLMClient:
         Used for SSE streaming to the browser for instant feel.
         Falls back to non-streaming Ollama if cloud fails.
         """
-        if self.provider in ["deepseek", "openrouter", "groq"]:
+        if self._is_cloud:
             if not _quick_net_check():
                 logger.warning("📡 No internet — falling back to Ollama (non-streaming)")
                 yield self._call_ollama(prompt, system, history)
@@ -362,21 +620,7 @@ class LLMClient:
     def _stream_cloud_openai(self, prompt: str, system: str | None, history: list[dict] | None = None):
         """Streaming call to Groq/OpenRouter — yields tokens as they arrive."""
         url = f"{self.base_url.rstrip('/')}/chat/completions"
-
-        messages = []
-        if system:
-            messages.append({"role": "system", "content": system})
-
-        messages.extend(self._history_messages(history))
-
-        messages.append({"role": "user", "content": prompt})
-
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "http://localhost:5000",
-            "X-Title": "OpenAgent",
-        }
+        messages = self._build_messages(prompt, system, history)
 
         payload = {
             "model": self.model,
@@ -389,21 +633,20 @@ class LLMClient:
         logger.info(f"Cloud STREAM ({self.provider}) → model={self.model}")
 
         resp = _session.post(
-            url, json=payload, headers=headers,
+            url, data=_json_dumps(payload), headers=self._headers,
             timeout=self.cfg.timeout_seconds, stream=True
         )
         resp.raise_for_status()
-        resp.encoding = "utf-8"
-
-        for line in resp.iter_lines(decode_unicode=True):
-            if not line:
-                continue
-            if line.startswith("data: "):
-                data_str = line[6:]
-                if data_str.strip() == "[DONE]":
+
+        # Work on raw bytes: only the JSON payload is decoded (by the
+        # JSON codec itself), never the whole SSE line
+        for line in resp.iter_lines():
+            if line.startswith(b"data: "):
+                data = line[6:]
+                if data.strip() == b"[DONE]":
                     break
                 try:
-                    chunk = json.loads(data_str)
+                    chunk = _json_loads(data)
                     delta = chunk.get("choices", [{}])[0].get("delta", {})
                     content = delta.get("content", "")
                     if content:
@@ -414,12 +657,11 @@ class LLMClient:
     def is_available(self) -> bool:
         """Quick health-check."""
         try:
-            if self.provider in ["deepseek", "openrouter", "groq"]:
+            if self._is_cloud:
                 # OpenRouter check uses "GET /models" or similar
                 # Just check root or a known endpoint
                 url = self.base_url.rstrip("/") + "/models"
-                headers = {"Authorization": f"Bearer {self.api_key}"}
-                resp = _session.get(url, headers=headers, timeout=5)
+                resp = _session.get(url, headers=self._headers, timeout=5)
                 return resp.status_code == 200
             else:
                 resp = _session.get(f"{self.base_url}/api/tags", timeout=3)
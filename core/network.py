@@ -7,12 +7,12 @@ Returns True/False — used by the router to gate online tools.
 The result is cached for a short TTL (monotonic clock): the router
 calls this on EVERY online-routed request, and without the cache each
 request pays a fresh TCP connect — or a multi-second timeout when
-offline. Both online and offline results are cached; pass
+offline. Both online and offline results are cached (offline for a
+shorter window, so recovery is noticed quickly); pass
 force_refresh=True to bypass the cache.
 """
 
 from __future__ import annotations
-import socket
 import asyncio
 import threading
 import time
@@ -21,47 +21,52 @@ from openagent.config import settings
 
 # ── TTL cache (module-level, shared across event loops/threads) ──
 _CACHE_TTL_SECONDS = 30.0
+_OFFLINE_CACHE_TTL_SECONDS = 5.0
 _cache_lock = threading.Lock()
 _cached_result: bool | None = None
 _cached_at: float = 0.0
+# In-flight probe, so concurrent callers on the same loop share one
+_probe_task: asyncio.Task | None = None
 
 
 def reset_connectivity_cache() -> None:
     """Forget the cached result (used by tests and force-refresh paths)."""
-    global _cached_result, _cached_at
+    global _cached_result, _cached_at, _probe_task
     with _cache_lock:
         _cached_result = None
         _cached_at = 0.0
+        _probe_task = None
 
 
 async def check_connectivity(force_refresh: bool = False) -> bool:
     """
     Non-blocking check: can we reach the configured DNS host?
-    Result is cached for ~30 seconds; force_refresh=True re-probes now.
+    Result is cached for ~30 seconds (~5 when offline);
+    force_refresh=True re-probes now.
     """
-    global _cached_result, _cached_at
+    global _probe_task
 
     with _cache_lock:
-        if (
-            not force_refresh
-            and _cached_result is not None
-            and time.monotonic() - _cached_at < _CACHE_TTL_SECONDS
-        ):
-            return _cached_result
+        if not force_refresh and _cached_result is not None:
+            ttl = _CACHE_TTL_SECONDS if _cached_result else _OFFLINE_CACHE_TTL_SECONDS
+            if time.monotonic() - _cached_at < ttl:
+                return _cached_result
 
-    cfg = settings.network
     loop = asyncio.get_running_loop()
+    task = _probe_task
+    if task is None or task.done() or task.get_loop() is not loop:
+        task = _probe_task = loop.create_task(_probe())
+    # shield: one caller being cancelled must not cancel the shared probe
+    return await asyncio.shield(task)
+
+
+async def _probe() -> bool:
+    """Run one TCP probe and record the result in the cache."""
+    global _cached_result, _cached_at
+
+    cfg = settings.network
     try:
-        await asyncio.wait_for(
-            loop.run_in_executor(
-                None,
-                _tcp_ping,
-                cfg.check_host,
-                cfg.check_port,
-                cfg.check_timeout_seconds,
-            ),
-            timeout=cfg.check_timeout_seconds + 1,
-        )
+        await _tcp_ping(cfg.check_host, cfg.check_port, cfg.check_timeout_seconds)
         result = True
     except Exception:
         result = False
@@ -72,11 +77,11 @@ async def check_connectivity(force_refresh: bool = False) -> bool:
     return result
 
 
-def _tcp_ping(host: str, port: int, timeout: int) -> None:
-    """Blocking TCP connect — runs in thread pool via executor."""
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.settimeout(timeout)
+async def _tcp_ping(host: str, port: int, timeout: float) -> None:
+    """TCP connect on the event loop itself — no worker thread needed."""
+    _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    writer.close()
     try:
-        sock.connect((host, port))
-    finally:
-        sock.close()
+        await writer.wait_closed()
+    except OSError:
+        pass  # connection already torn down; the probe itself succeeded
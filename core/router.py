@@ -15,8 +15,10 @@ fine-tuned models which we don't have locally yet.
 
 from __future__ import annotations
 import re
+import functools
 import logging
 from pathlib import Path
+from typing import Callable
 from enum import Enum
 
 from openagent.core.network import check_connectivity
@@ -35,7 +37,13 @@ class ToolName(str, Enum):
 
 
 # ── keyword patterns ──────────────────────────────────────────
-_FILE_PATTERN = re.compile(r"\[FILE:(.*?)\]", re.IGNORECASE)
+# Messages that can only ever route to GENERAL — answered without
+# running the file/path/keyword scans below
+_TRIVIAL_INPUTS = frozenset({
+    "hi", "hello", "hey", "yo", "thanks", "thank you", "thx",
+    "ok", "okay", "bye", "goodbye", "good morning", "good night",
+})
+_TRIVIAL_MAX_LEN = max(map(len, _TRIVIAL_INPUTS)) + 3  # room for trailing "!.?"
 
 _SEARCH_KEYWORDS = {
     "search", "google", "find online", "look up", "what is the latest",
@@ -76,32 +84,143 @@ _FILE_OPS_KEYWORDS = {
 }
 
 
+# ── Detectors: [FILE:] tag, then URL + raw path in one pass ────
+# The tag is searched on its own and wins: the web UI appends it after
+# the user's text ("in /tmp/dir summarize: [FILE:...]"), and a raw-path
+# match starting earlier may run on into it.
+_FILE_TAG_RE = re.compile(r"\[FILE:(.*?)\]", re.IGNORECASE)
+_URL_RE = re.compile(r"https?://[^\s]+")
+
+# Named alternatives, read back through m.lastgroup. A URL is matched
+# (and consumed) as a whole, so the ":/" inside "https://..." can no
+# longer be mistaken for a Windows "s:/" drive path.
+_DETECT_RE = re.compile(
+    r"(?P<url>https?://[^\s]+)"
+    # Quoted paths: "C:\path\to file.pdf" or 'C:\path\to file.pdf'
+    r'|["\'](?P<quoted>[A-Za-z]:[\\\/][^"\']+)["\']'
+    # Windows path with extension (handles spaces by matching up to known extensions)
+    r'|(?P<win_ext>[A-Za-z]:\\[^\n<>|]*?\.\w{1,5})\b'
+    # Windows path with forward slashes
+    r'|(?P<win_fwd>[A-Za-z]:/[^\n<>|]*?\.\w{1,5})\b'
+    # Unix paths
+    r'|(?P<unix>/(?:home|tmp|var|etc|usr|opt)/[^\n<>|]*?\.\w{1,5})\b'
+)
+
+
+def _scan(text: str) -> tuple[str | None, str | None]:
+    """First (raw path, URL) in the message, in one pass; None if absent."""
+    raw_path = url = None
+    for m in _DETECT_RE.finditer(text):
+        kind = m.lastgroup
+        if kind == "url":
+            if url is None:
+                url = m.group("url")
+        elif raw_path is None:
+            raw_path = m.group(kind).strip()
+    return raw_path, url
+
+
+def _detect(text: str) -> tuple[str | None, str | None, str | None]:
+    """
+    Scan the message for (file tag path, raw path, URL) — the first of
+    each kind, or None. With a tag present the raw path isn't needed
+    (the tag routes first), and the URL is searched on its own so a
+    raw-path match can't swallow it.
+    """
+    tag = _FILE_TAG_RE.search(text)
+    if tag:
+        url = _URL_RE.search(text)
+        return tag.group(1).strip(), None, url.group(0) if url else None
+    return (None, *_scan(text))
+
+
 def _extract_raw_path(text: str) -> str | None:
     """Detect raw absolute file paths in user messages, including paths with spaces."""
-    # 1. Quoted paths: "C:\path\to file.pdf" or 'C:\path\to file.pdf'
-    quoted = re.search(r'["\']([A-Za-z]:[\\\/][^"\']+)["\']', text)
-    if quoted:
-        return quoted.group(1).strip()
+    return _scan(text)[0]
 
-    # 2. Windows path with extension (handles spaces by matching up to known extensions)
-    win_ext = re.search(r'([A-Za-z]:\\[^\n<>|]*?\.\w{1,5})\b', text)
-    if win_ext:
-        return win_ext.group(1).strip()
+# File extensions we can parse
+_PARSEABLE_EXTENSIONS = {".txt", ".pdf", ".docx", ".png", ".jpg", ".jpeg", ".bmp", ".tiff"}
 
-    # 3. Windows path with forward slashes
-    win_fwd = re.search(r'([A-Za-z]:/[^\n<>|]*?\.\w{1,5})\b', text)
-    if win_fwd:
-        return win_fwd.group(1).strip()
 
-    # 4. Unix paths
-    unix = re.search(r'(/(?:home|tmp|var|etc|usr|opt)/[^\n<>|]*?\.\w{1,5})\b', text)
-    if unix:
-        return unix.group(1).strip()
+# ── Merged keyword scanner ────────────────────────────────────
+# Keyword categories for steps 2–7 of route(), in priority order.
+_CATEGORY_KEYWORDS: tuple[tuple[ToolName, set[str]], ...] = (
+    (ToolName.OCR_IMAGE, _OCR_KEYWORDS),
+    (ToolName.RUN_COMMAND, _COMMAND_KEYWORDS),
+    (ToolName.WEB_FETCH, _FETCH_KEYWORDS),   # any http(s):// link matches here
+    (ToolName.WEB_SEARCH, _SEARCH_KEYWORDS),
+    (ToolName.SUMMARIZE, _SUMMARIZE_KEYWORDS),
+    (ToolName.FILE_OPS, _FILE_OPS_KEYWORDS),
+)
+_CATEGORY_RANK = {tool: rank for rank, (tool, _) in enumerate(_CATEGORY_KEYWORDS)}
 
-    return None
 
-# File extensions we can parse
-_PARSEABLE_EXTENSIONS = {".txt", ".pdf", ".docx", ".png", ".jpg", ".jpeg", ".bmp", ".tiff"}
+@functools.cache
+def _keyword_scanner() -> Callable[[str], set[ToolName]]:
+    """
+    Build (on first use, not at import) a function returning the set of
+    categories whose keywords occur in a lowered text, in one pass.
+
+    With pyahocorasick installed this is an Aho-Corasick automaton over
+    every keyword. Otherwise it is one regex: a zero-width lookahead
+    reports a match at every position; with the alternation ordered
+    longest-first, the keyword reported at a position is the longest one
+    starting there, and every other keyword starting there is a prefix
+    of it. So each keyword maps to the categories of all its keyword
+    prefixes (itself included), and the union over matches is exactly
+    the set of categories whose keywords occur in the text.
+    """
+    categories: dict[str, set[ToolName]] = {}
+    for tool, keywords in _CATEGORY_KEYWORDS:
+        for kw in keywords:
+            categories.setdefault(kw, set()).add(tool)
+
+    try:
+        import ahocorasick
+    except ImportError:  # optional speedup
+        ahocorasick = None
+
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for kw, tools in categories.items():
+            automaton.add_word(kw, frozenset(tools))
+        automaton.make_automaton()
+
+        def scan(text_lower: str) -> set[ToolName]:
+            found: set[ToolName] = set()
+            for _, tools in automaton.iter(text_lower):
+                found |= tools
+            return found
+
+        return scan
+
+    closure = {
+        kw: frozenset().union(*(tools for other, tools in categories.items() if kw.startswith(other)))
+        for kw in categories
+    }
+    ordered = sorted(categories, key=len, reverse=True)
+    pattern = re.compile("(?=(" + "|".join(map(re.escape, ordered)) + "))")
+
+    def scan(text_lower: str) -> set[ToolName]:
+        found: set[ToolName] = set()
+        for m in pattern.finditer(text_lower):
+            found |= closure[m.group(1)]
+        return found
+
+    return scan
+
+
+@functools.lru_cache(maxsize=1024)
+def _keyword_category(text_lower: str) -> ToolName | None:
+    """
+    Keyword classification for steps 2–7 of route(): the highest-priority
+    category with a keyword in the text, found in a single pass.
+    Pure function of the lowered text, so it is memoized; the parts of
+    routing that depend on the outside world (file existence,
+    connectivity) are deliberately kept out of the cache.
+    """
+    found = _keyword_scanner()(text_lower)
+    return min(found, key=_CATEGORY_RANK.__getitem__) if found else None
 
 
 async def route(user_input: str) -> tuple[ToolName, dict]:
@@ -110,40 +229,50 @@ async def route(user_input: str) -> tuple[ToolName, dict]:
     context_dict carries extracted info (file path, URL, query, etc.)
     """
     text = user_input.strip()
-    text_lower = text.lower()
+
+    if len(text) <= _TRIVIAL_MAX_LEN and text.lower().rstrip("!.? ") in _TRIVIAL_INPUTS:
+        return ToolName.GENERAL, {"prompt": text}
+
+    file_ref, raw_path, url = _detect(text)
 
     # ── 1. Explicit file reference ────────────────────────────
-    file_match = _FILE_PATTERN.search(text)
-    if file_match:
-        filepath = Path(file_match.group(1).strip())
+    if file_ref is not None:
+        filepath = Path(file_ref)
         if filepath.exists():
             ext = filepath.suffix.lower()
             if ext in (".png", ".jpg", ".jpeg", ".bmp", ".tiff"):
-                # Use OCR only if explicit OCR keywords; otherwise analyze
-                if any(kw in text_lower for kw in _OCR_KEYWORDS):
+                # Use OCR only if explicit OCR keywords; otherwise analyze.
+                # OCR is the top-priority category, so the keyword scan
+                # reports it whenever any OCR keyword is present.
+                if _keyword_category(text.lower()) is ToolName.OCR_IMAGE:
                     return ToolName.OCR_IMAGE, {"filepath": filepath, "prompt": text}
                 return ToolName.ANALYZE_IMAGE, {"filepath": filepath, "prompt": text}
             if ext in _PARSEABLE_EXTENSIONS:
-                return ToolName.PARSE_FILE, {"filepath": filepath, "prompt": text}
+                ctx = {"filepath": filepath, "prompt": text}
+                # A URL alongside the file ("compare this with https://...")
+                # is fetched concurrently with the parse
+                if url:
+                    ctx["url"] = url
+                return ToolName.PARSE_FILE, ctx
         return ToolName.GENERAL, {"prompt": text}
 
     # ── 1b. Raw file path in message (no [FILE:] tag) ─────────
-    raw_path = _extract_raw_path(text)
     if raw_path:
         return ToolName.FILE_OPS, {"prompt": text, "detected_path": raw_path}
 
+    # Lowered only now: the file-tag and raw-path routes above don't need it
+    category = _keyword_category(text.lower())
+
     # ── 2. OCR keywords ───────────────────────────────────────
-    if any(kw in text_lower for kw in _OCR_KEYWORDS):
+    if category is ToolName.OCR_IMAGE:
         return ToolName.OCR_IMAGE, {"prompt": text}
 
     # ── 3. Command execution keywords ─────────────────────────
-    if any(kw in text_lower for kw in _COMMAND_KEYWORDS):
+    if category is ToolName.RUN_COMMAND:
         return ToolName.RUN_COMMAND, {"prompt": text}
 
     # ── 4. URL fetch (check for http links) ───────────────────
-    url_match = re.search(r"(https?://[^\s]+)", text)
-    if url_match or any(kw in text_lower for kw in _FETCH_KEYWORDS):
-        url = url_match.group(1) if url_match else None
+    if category is ToolName.WEB_FETCH:
         online = await check_connectivity()
         if not online:
             return ToolName.GENERAL, {
@@ -153,7 +282,7 @@ async def route(user_input: str) -> tuple[ToolName, dict]:
         return ToolName.WEB_FETCH, {"url": url, "prompt": text}
 
     # ── 5. Web search keywords ────────────────────────────────
-    if any(kw in text_lower for kw in _SEARCH_KEYWORDS):
+    if category is ToolName.WEB_SEARCH:
         online = await check_connectivity()
         if not online:
             return ToolName.GENERAL, {
@@ -163,11 +292,11 @@ async def route(user_input: str) -> tuple[ToolName, dict]:
         return ToolName.WEB_SEARCH, {"query": text, "prompt": text}
 
     # ── 6. Summarization keywords ─────────────────────────────
-    if any(kw in text_lower for kw in _SUMMARIZE_KEYWORDS):
+    if category is ToolName.SUMMARIZE:
         return ToolName.SUMMARIZE, {"prompt": text}
 
     # ── 7. File operations (MCP) ──────────────────────────────
-    if any(kw in text_lower for kw in _FILE_OPS_KEYWORDS):
+    if category is ToolName.FILE_OPS:
         return ToolName.FILE_OPS, {"prompt": text}
 
     # ── 8. Default: send to LLM directly ──────────────────────
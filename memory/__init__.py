@@ -5,10 +5,20 @@ Memory package — public surface.
 The live implementation lives in openagent.memory.store.MemoryStore.
 This file used to hold a stale full duplicate of an older store.py;
 it is now a thin re-export so there is exactly one implementation.
+
+MemoryStore is resolved lazily (PEP 562 module __getattr__), so
+importing a submodule such as memory.proximity doesn't pull in
+chromadb and the embedding stack.
 """
 
 from __future__ import annotations
 
-from openagent.memory.store import MemoryStore
-
 __all__ = ["MemoryStore"]
+
+
+def __getattr__(name: str):
+    if name == "MemoryStore":
+        from openagent.memory.store import MemoryStore
+        globals()["MemoryStore"] = MemoryStore
+        return MemoryStore
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
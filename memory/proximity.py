@@ -0,0 +1,135 @@
+# openagent/memory/proximity.py
+"""
+Proximity cache — approximate memoization for memory retrieval.
+
+Chat traffic repeats itself: the same question re-asked, or rephrased
+("what's rust?" / "what is rust"). Each repeat used to pay an embedding
+plus a full vector-DB query for a context string we already had.
+
+Two levels, checked in order:
+  1. Exact: 128-bit BLAKE2b digest of the query text → cached context.
+     Hits skip even the embedding.
+  2. Approximate: the query embedding is compared against every cached
+     key with one matrix-vector product; if the nearest one is within
+     cosine distance tau, its context is reused.
+
+Bounded (LRU, default 256 entries). Writes to the memory store must
+call invalidate_near() with the new documents' embeddings, so that
+cached contexts which the new memories could change are dropped.
+"""
+
+from __future__ import annotations
+import hashlib
+import threading
+
+import numpy as np
+
+
+class ProximityCache:
+    def __init__(self, capacity: int = 256, tau: float = 0.1):
+        self.capacity = capacity
+        self.tau = tau
+        self._lock = threading.Lock()
+        self._keys: np.ndarray | None = None       # (capacity, dim) unit vectors
+        self._values: list[str | None] = [None] * capacity
+        self._digests: list[bytes | None] = [None] * capacity
+        self._by_digest: dict[bytes, int] = {}      # exact-match index → slot
+        self._used = np.zeros(capacity, dtype=np.int64)  # LRU clock per slot (0 = empty)
+        self._tick = 0
+
+    @staticmethod
+    def _digest(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    @staticmethod
+    def _unit(vec) -> np.ndarray:
+        v = np.asarray(vec, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm else v
+
+    def _touch(self, slot: int) -> None:
+        self._tick += 1
+        self._used[slot] = self._tick
+
+    def get_exact(self, text: str) -> str | None:
+        """Return the context cached for exactly this query text, if any."""
+        with self._lock:
+            slot = self._by_digest.get(self._digest(text))
+            if slot is None:
+                return None
+            self._touch(slot)
+            return self._values[slot]
+
+    def lookup(self, embedding) -> str | None:
+        """Return the context of the nearest cached query within tau, if any."""
+        q = self._unit(embedding)
+        with self._lock:
+            if self._keys is None or self._keys.shape[1] != q.shape[0]:
+                return None
+            live = self._used > 0
+            if not live.any():
+                return None
+            dist = 1.0 - self._keys @ q
+            dist[~live] = np.inf
+            slot = int(np.argmin(dist))
+            if dist[slot] > self.tau:
+                return None
+            self._touch(slot)
+            return self._values[slot]
+
+    def insert(self, text: str, embedding, context: str) -> None:
+        """Cache the context retrieved for a query (evicts the LRU entry when full)."""
+        q = self._unit(embedding)
+        digest = self._digest(text)
+        with self._lock:
+            if self._keys is None or self._keys.shape[1] != q.shape[0]:
+                # First insert (or embedding model changed): size the key matrix
+                self._reset(q.shape[0])
+            slot = self._by_digest.get(digest)
+            if slot is None:
+                slot = int(np.argmin(self._used))  # an empty slot, else the LRU one
+                old = self._digests[slot]
+                if old is not None:
+                    self._by_digest.pop(old, None)
+            self._keys[slot] = q
+            self._values[slot] = context
+            self._digests[slot] = digest
+            self._by_digest[digest] = slot
+            self._touch(slot)
+
+    def invalidate_near(self, embeddings, radius: float) -> None:
+        """
+        Drop cached entries whose query lies within cosine distance
+        `radius` of any of the given (newly stored) document embeddings —
+        those are the queries whose retrieval result may now differ.
+        """
+        with self._lock:
+            if self._keys is None or not (self._used > 0).any():
+                return
+            docs = np.stack([self._unit(e) for e in embeddings])
+            if docs.shape[1] != self._keys.shape[1]:
+                self._reset(self._keys.shape[1])
+                return
+            near = ((1.0 - self._keys @ docs.T) < radius).any(axis=1) & (self._used > 0)
+            for slot in np.flatnonzero(near):
+                self._evict(int(slot))
+
+    def clear(self) -> None:
+        with self._lock:
+            if self._keys is not None:
+                self._reset(self._keys.shape[1])
+
+    def _evict(self, slot: int) -> None:
+        digest = self._digests[slot]
+        if digest is not None:
+            self._by_digest.pop(digest, None)
+        self._digests[slot] = None
+        self._values[slot] = None
+        self._used[slot] = 0
+
+    def _reset(self, dim: int) -> None:
+        self._keys = np.zeros((self.capacity, dim), dtype=np.float32)
+        self._values = [None] * self.capacity
+        self._digests = [None] * self.capacity
+        self._by_digest.clear()
+        self._used[:] = 0
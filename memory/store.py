@@ -21,9 +21,12 @@ Why sentence-transformers (all-MiniLM-L6-v2):
 
 from __future__ import annotations
 import asyncio
+import functools
+import itertools
 import logging
 import os
-import uuid
+import secrets
+import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
 
@@ -31,6 +34,7 @@ import chromadb
 from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
 
 from openagent.config import settings
+from openagent.memory.proximity import ProximityCache
 
 logger = logging.getLogger("openagent.memory")
 
@@ -41,25 +45,75 @@ logger = logging.getLogger("openagent.memory")
 # pending writes still flush on shutdown.
 _STORE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="openagent-memstore")
 
+# Messages shorter than this ("hi", "ok", "thank you") are never stored,
+# and retrieval for them returns nothing without running the embedder.
+_MIN_QUERY_CHARS = 10
+
+# ChromaDB cosine distance: 0 = identical, 2 = opposite.
+# Only memories closer than this are injected as context.
+RELEVANCE_THRESHOLD = 0.8
+
+# The CLI and the web UI share one DB directory by default, so the local
+# item count is re-read from the collection every this many retrievals
+# (and whenever it is 0) to pick up the other process's writes.
+_COUNT_RECONCILE_EVERY = 32
+
+
+@functools.lru_cache(maxsize=4)
+def _embedding_function(model_name: str) -> SentenceTransformerEmbeddingFunction:
+    """
+    One embedding function (and so one loaded model) per model name for
+    the whole process — re-creating a store doesn't reload the weights.
+    """
+    return SentenceTransformerEmbeddingFunction(model_name=model_name)
+
 
 class MemoryStore:
-    def __init__(self, client: chromadb.ClientAPI, collection):
+    def __init__(self, client: chromadb.ClientAPI, collection, embed_fn=None):
         self._client = client
         self._collection = collection
         self.cfg = settings.memory
+        # Item count tracked locally — collection.count() is a SQL COUNT(*).
+        # Reconciled periodically in retrieve_sync() (see _reconcile_count)
+        self._count = collection.count()
+        self._retrievals = 0
+        # Row ids: random per-process prefix + counter — short, unique
+        # across restarts, and no os.urandom() call per stored item
+        self._id_prefix = secrets.token_hex(6)
+        self._id_seq = itertools.count(self._count)
+        # Embedding function, called directly so each query/document is
+        # embedded once and the vector reused (cache lookup + DB query)
+        self._embed_fn = embed_fn
+        # Near-duplicate queries reuse a previous retrieval (see proximity.py)
+        self._proximity = ProximityCache()
+        # Bumped (under _write_lock) by every write after it lands; a
+        # retrieval only caches its result if no write happened meanwhile,
+        # else an invalidate_near() racing the query would be undone.
+        # The lock also covers each write + its _count update, so a
+        # reconcile can't land in between and count the items twice.
+        self._write_gen = 0
+        self._write_lock = threading.Lock()
+        # Interactions queued by store_background(), drained in batches
+        self._pending: list[tuple[str, str]] = []
+        self._pending_lock = threading.Lock()
 
     @classmethod
     async def create(cls) -> "MemoryStore":
         """
         Factory: sets up persistent ChromaDB + embedding function.
-        Called once at agent startup.
+        Called once at agent startup. The blocking setup (model load,
+        SQLite open) runs in a worker thread so callers can overlap it
+        with other startup work.
         """
+        return await asyncio.to_thread(cls._create_sync)
+
+    @classmethod
+    def _create_sync(cls) -> "MemoryStore":
+        """Blocking body of create()."""
         cfg = settings.memory
 
         # Embedding function — uses sentence-transformers locally
-        embed_fn = SentenceTransformerEmbeddingFunction(
-            model_name=cfg.embedding_model
-        )
+        embed_fn = _embedding_function(cfg.embedding_model)
 
         # Determine the effective DB path.
         # On ephemeral hosts (e.g. HuggingFace Spaces) the container filesystem
@@ -109,12 +163,13 @@ class MemoryStore:
             # If default tenant fails, try to be even more explicit (some versions need this)
             raise
 
+        store = cls(client=client, collection=collection, embed_fn=embed_fn)
         logger.info(
             f"Memory store initialized: {effective_path} "
             f"| collection={cfg.collection_name} "
-            f"| items={collection.count()}"
+            f"| items={store._count}"
         )
-        return cls(client=client, collection=collection)
+        return store
 
     def store_sync(self, user_input: str, response: str) -> None:
         """
@@ -122,34 +177,85 @@ class MemoryStore:
         Document = "user: ... | agent: ..." for retrieval coherence.
         Skips trivial interactions to keep memory clean.
         """
-        # Don't store trivial/short interactions — they add noise
-        if len(user_input.strip()) < 10 or len(response.strip()) < 20:
-            logger.debug("Skipping trivial interaction (too short to be useful)")
+        self.store_batch_sync([(user_input, response)])
+
+    def store_batch_sync(self, items: list[tuple[str, str]]) -> None:
+        """
+        Embed and persist several interactions with ONE collection.add()
+        — one embedding forward pass and one SQLite write for the batch.
+        """
+        docs: list[str] = []
+        for user_input, response in items:
+            # Don't store trivial/short interactions — they add noise
+            if len(user_input.strip()) < _MIN_QUERY_CHARS or len(response.strip()) < 20:
+                logger.debug("Skipping trivial interaction (too short to be useful)")
+                continue
+            docs.append(f"user: {user_input}\nagent: {response}")
+        if not docs:
             return
 
-        doc = f"user: {user_input}\nagent: {response}"
-        self._collection.add(
-            documents=[doc],
-            ids=[str(uuid.uuid4())],
-            metadatas=[{"timestamp": time.time()}],
-        )
-        logger.debug(f"Stored memory item (total: {self._collection.count()})")
+        now = time.time()
+        embeddings = self._embed_fn(docs) if self._embed_fn else None
+        ids = [f"{self._id_prefix}-{next(self._id_seq)}" for _ in docs]
+        with self._write_lock:
+            self._collection.add(
+                documents=docs,
+                embeddings=embeddings,
+                ids=ids,
+                metadatas=[{"timestamp": now} for _ in docs],
+            )
+            self._count += len(docs)
+            # New memories can change what nearby queries retrieve
+            self._write_gen += 1
+            if embeddings is not None:
+                self._proximity.invalidate_near(
+                    embeddings, RELEVANCE_THRESHOLD + self._proximity.tau
+                )
+            else:
+                self._proximity.clear()
+        logger.debug(f"Stored {len(docs)} memory item(s) (total: {self._count})")
 
-    def _store_safe(self, user_input: str, response: str) -> None:
-        """store_sync wrapper that logs instead of raising (background use)."""
-        try:
-            self.store_sync(user_input, response)
-        except Exception as e:
-            logger.warning(f"Background memory store failed: {e}")
+    def _flush_pending(self) -> None:
+        """
+        Drain the background queue in batches (runs on _STORE_EXECUTOR).
+        Interactions queued while a batch is being embedded are picked
+        up by the same drain, so bursts coalesce into few add() calls
+        of up to settings.memory.batch_size interactions each.
+        """
+        batch_size = max(1, self.cfg.batch_size)
+        while True:
+            with self._pending_lock:
+                batch = self._pending[:batch_size]
+                del self._pending[:batch_size]
+            if not batch:
+                return
+            try:
+                self.store_batch_sync(batch)
+            except Exception as e:
+                logger.warning(f"Background memory store failed ({len(batch)} item(s)): {e}")
 
     def store_background(self, user_input: str, response: str) -> None:
         """
-        Fire-and-forget store: submits the embedding + write to a
-        background thread so the caller can return the response to the
-        user without paying the embedding latency. Safe to call from
-        any thread/event loop; failures are logged, never raised.
+        Fire-and-forget store: queues the interaction for the background
+        writer thread so the caller can return the response to the user
+        without paying the embedding latency. Safe to call from any
+        thread/event loop; failures are logged, never raised.
+        """
+        with self._pending_lock:
+            self._pending.append((user_input, response))
+        _STORE_EXECUTOR.submit(self._flush_pending)
+
+    def flush_sync(self) -> None:
+        """
+        Block until every interaction queued so far is written. The
+        executor has one worker, so a drain submitted now runs after all
+        earlier ones.
         """
-        _STORE_EXECUTOR.submit(self._store_safe, user_input, response)
+        _STORE_EXECUTOR.submit(self._flush_pending).result()
+
+    async def flush(self) -> None:
+        """Awaitable flush_sync() — for graceful shutdown."""
+        await asyncio.to_thread(self.flush_sync)
 
     async def store(self, user_input: str, response: str) -> None:
         """
@@ -157,51 +263,135 @@ class MemoryStore:
         the event loop isn't stalled. Completes before returning (use
         store_background() when the caller shouldn't wait at all).
         """
-        loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, self.store_sync, user_input, response)
+        await asyncio.to_thread(self.store_sync, user_input, response)
+
+    async def store_batch(self, items: list[tuple[str, str]]) -> None:
+        """Awaitable store_batch_sync()."""
+        await asyncio.to_thread(self.store_batch_sync, items)
+
+    def clear_sync(self) -> None:
+        """
+        Delete every stored memory (and anything still queued) and drop
+        cached retrievals. The collection itself is kept.
+        """
+        with self._pending_lock:
+            self._pending.clear()
+        with self._write_lock:
+            ids = self._collection.get(include=[])["ids"]
+            if ids:
+                self._collection.delete(ids=ids)
+            self._count = 0
+            self._write_gen += 1
+            self._proximity.clear()
+
+    async def clear(self) -> None:
+        """Awaitable clear_sync()."""
+        await asyncio.to_thread(self.clear_sync)
+
+    def warmup_sync(self) -> None:
+        """
+        Run one throwaway query so the first real retrieve() doesn't pay
+        for lazy initialization (HNSW index load from disk, first
+        embedding forward pass). Best-effort — failures are ignored.
+        """
+        try:
+            if self._count:
+                self._collection.query(query_texts=["warmup"], n_results=1, include=[])
+        except Exception as e:
+            logger.debug(f"Memory warmup failed (ignored): {e}")
+
+    async def warmup(self) -> None:
+        """Awaitable warmup_sync() — runs in a worker thread."""
+        await asyncio.to_thread(self.warmup_sync)
 
     def retrieve_sync(self, query: str) -> str:
         """
         Retrieve the top-N most relevant past interactions (blocking).
         Returns a formatted string ready to inject into the prompt.
+        Repeated and near-duplicate queries are answered from the
+        proximity cache without touching the vector DB.
         """
-        n = settings.memory.max_context_chunks
-        count = self._collection.count()
+        # Exact-cache key: case and surrounding whitespace don't change
+        # what a re-asked question should retrieve
+        key = query.strip().lower()
+        if len(key) < _MIN_QUERY_CHARS:
+            return ""
+
+        self._retrievals += 1
+        if self._count == 0 or self._retrievals % _COUNT_RECONCILE_EVERY == 0:
+            self._reconcile_count()
+
+        cached = self._proximity.get_exact(key)
+        if cached is not None:
+            return cached
 
+        count = self._count
         if count == 0:
             return ""
+        write_gen = self._write_gen
 
         # Can't request more results than exist
-        n = min(n, count)
+        n = min(settings.memory.max_context_chunks, count)
 
-        results = self._collection.query(
-            query_texts=[query],
-            n_results=n,
-            include=["documents", "distances"],
-        )
+        if self._embed_fn:
+            q_emb = self._embed_fn([query])[0]
+            cached = self._proximity.lookup(q_emb)
+            if cached is not None:
+                return cached
+            results = self._collection.query(
+                query_embeddings=[q_emb],
+                n_results=n,
+                include=["distances"],
+            )
+        else:
+            q_emb = None
+            results = self._collection.query(
+                query_texts=[query],
+                n_results=n,
+                include=["distances"],
+            )
 
-        docs = results.get("documents", [[]])[0]
+        # Filter by similarity on ids + distances first, so only the
+        # documents that will actually be injected are read out of the DB
+        kept: list[tuple[int, str]] = []
+        ids = results.get("ids", [[]])[0]
         distances = results.get("distances", [[]])[0]
-        if not docs:
-            return ""
-
-        # Filter by similarity — only include relevant memories
-        # ChromaDB cosine distance: 0 = identical, 2 = opposite
-        # Threshold 0.8 = only reasonably similar memories
-        RELEVANCE_THRESHOLD = 0.8
-        chunks = []
-        for i, (doc, dist) in enumerate(zip(docs, distances), 1):
+        for i, (doc_id, dist) in enumerate(zip(ids, distances), 1):
             if dist < RELEVANCE_THRESHOLD:
-                chunks.append(f"[Memory {i}]\n{doc}")
+                kept.append((i, doc_id))
             else:
                 logger.debug(f"Skipping memory {i} (distance={dist:.2f}, too far)")
 
-        return "\n\n".join(chunks)
+        context = ""
+        if kept:
+            got = self._collection.get(ids=[doc_id for _, doc_id in kept], include=["documents"])
+            docs = dict(zip(got["ids"], got["documents"]))
+            context = "\n\n".join(
+                f"[Memory {i}]\n{docs[doc_id]}" for i, doc_id in kept if doc_id in docs
+            )
+
+        if q_emb is not None:
+            with self._write_lock:
+                if self._write_gen == write_gen:
+                    self._proximity.insert(key, q_emb, context)
+        return context
+
+    def _reconcile_count(self) -> None:
+        """
+        Re-read the item count from the collection. A change we didn't
+        make means another process wrote to the shared DB: its memories
+        never went through invalidate_near(), so drop cached retrievals.
+        """
+        with self._write_lock:
+            n = self._collection.count()
+            if n != self._count:
+                self._count = n
+                self._write_gen += 1
+                self._proximity.clear()
 
     async def retrieve(self, query: str) -> str:
         """
         Awaitable retrieve — runs the blocking embed + vector query in a
         thread so a shared event loop isn't stalled during embedding.
         """
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, self.retrieve_sync, query)
+        return await asyncio.to_thread(self.retrieve_sync, query)
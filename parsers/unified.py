@@ -9,6 +9,7 @@ Adding a new format = add an import + one line in the dispatch dict.
 """
 
 from __future__ import annotations
+from functools import lru_cache
 from pathlib import Path
 import logging
 
@@ -40,8 +41,10 @@ def parse_file(filepath: Path) -> str:
         ValueError — unsupported file format
         RuntimeError — parser-specific error
     """
-    if not filepath.exists():
-        raise FileNotFoundError(f"File not found: {filepath}")
+    try:
+        st = filepath.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        raise FileNotFoundError(f"File not found: {filepath}") from None
 
     ext = filepath.suffix.lower()
 
@@ -53,8 +56,18 @@ def parse_file(filepath: Path) -> str:
             f"Supported formats: {supported}"
         )
 
+    # Re-asking about the same (unchanged) file reuses the parsed text;
+    # editing the file changes mtime/size and so the cache key.
+    return _parse_cached(str(filepath.resolve()), st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=32)
+def _parse_cached(resolved: str, mtime_ns: int, size: int) -> str:
+    """Parse one file version. Only successful parses are cached."""
+    filepath = Path(resolved)
+    ext = filepath.suffix.lower()
     logger.info(f"Parsing {filepath.name} (format: {ext})")
-    return parser_fn(filepath)
+    return _PARSERS[ext](filepath)
 
 
 def supported_extensions() -> list[str]:
@@ -0,0 +1,59 @@
+# openagent/tests/conftest.py
+"""
+Shared fixtures. Expensive setup (ChromaDB + embedding model, sample
+documents) is done once per session; per-test fixtures reset its state.
+Optional parser libraries are imported with importorskip, so a missing
+one skips its tests instead of failing them.
+"""
+
+import asyncio
+
+import pytest
+
+import openagent.config as cfg_module
+
+
+@pytest.fixture(scope="session")
+def _memory_store(tmp_path_factory):
+    """One MemoryStore for the whole session, backed by a temp directory."""
+    path = tmp_path_factory.mktemp("chroma")
+    with pytest.MonkeyPatch.context() as mp:
+        # The env var takes priority over db_path (and over /data on HF Spaces)
+        mp.setenv("CHROMA_DB_PATH", str(path))
+        mp.setattr(cfg_module.settings.memory, "db_path", str(path))
+        from openagent.memory.store import MemoryStore
+        yield asyncio.run(MemoryStore.create())
+
+
+@pytest.fixture
+def memory_store(_memory_store):
+    """The session MemoryStore, emptied before each test."""
+    _memory_store.clear_sync()
+    return _memory_store
+
+
+@pytest.fixture(scope="session")
+def sample_docx(tmp_path_factory):
+    """A two-paragraph DOCX, built once per session (parsers only read it)."""
+    Document = pytest.importorskip("docx").Document
+
+    f = tmp_path_factory.mktemp("docx") / "sample.docx"
+    doc = Document()
+    doc.add_paragraph("First paragraph.")
+    doc.add_paragraph("Second paragraph.")
+    doc.save(str(f))
+    return f
+
+
+@pytest.fixture(scope="session")
+def sample_pdf(tmp_path_factory):
+    """A one-page PDF, built once per session."""
+    fitz = pytest.importorskip("fitz")
+
+    f = tmp_path_factory.mktemp("pdf") / "sample.pdf"
+    doc = fitz.open()
+    page = doc.new_page(width=612, height=792)
+    page.insert_text((72, 72), "Hello from a test PDF.", fontsize=12)
+    doc.save(str(f))
+    doc.close()
+    return f
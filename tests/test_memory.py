@@ -1,68 +1,84 @@
 # openagent/tests/test_memory.py
 """
 Tests for the ChromaDB memory store.
-Uses a temporary directory so tests don't pollute the real DB.
+Uses a session-wide store in a temporary directory (see conftest.py)
+so tests don't pollute the real DB.
 """
 
 import pytest
-import tempfile
-import os
-
-# Patch settings to use a temp directory before importing MemoryStore
-import openagent.config as cfg_module
-
-
-@pytest.fixture
-def temp_memory_path(tmp_path, monkeypatch):
-    """Override memory db_path to a temp directory for testing."""
-    monkeypatch.setattr(
-        cfg_module.settings.memory,
-        "db_path",
-        str(tmp_path / "test_chroma"),
-    )
-    return tmp_path / "test_chroma"
 
 
 class TestMemoryStore:
     @pytest.mark.asyncio
-    async def test_store_and_retrieve(self, temp_memory_path):
-        from openagent.memory.store import MemoryStore
-
-        store = await MemoryStore.create()
-
+    async def test_store_and_retrieve(self, memory_store):
         # Store an interaction
-        await store.store(
+        await memory_store.store(
             "What is Python?",
             "Python is a high-level programming language."
         )
 
         # Retrieve with a semantically similar query
-        result = await store.retrieve("Tell me about Python programming")
+        result = await memory_store.retrieve("Tell me about Python programming")
 
         assert result != ""
         assert "Python" in result
 
     @pytest.mark.asyncio
-    async def test_retrieve_empty_store(self, temp_memory_path):
-        from openagent.memory.store import MemoryStore
-
-        store = await MemoryStore.create()
-        result = await store.retrieve("anything")
+    async def test_retrieve_empty_store(self, memory_store):
+        result = await memory_store.retrieve("anything at all")
         assert result == ""
 
     @pytest.mark.asyncio
-    async def test_multiple_items_retrieval(self, temp_memory_path):
-        from openagent.memory.store import MemoryStore
+    async def test_short_query_skips_embedder(self, memory_store, monkeypatch):
+        await memory_store.store("What is Python?", "Python is a high-level programming language.")
+
+        def fail(texts):
+            raise AssertionError("embedder called for a short query")
 
-        store = await MemoryStore.create()
+        monkeypatch.setattr(memory_store, "_embed_fn", fail)
+        assert await memory_store.retrieve("Python?") == ""
 
+    @pytest.mark.asyncio
+    async def test_multiple_items_retrieval(self, memory_store):
         # Store multiple interactions
-        await store.store("What is JavaScript?", "JS is a web scripting language.")
-        await store.store("What is Python?", "Python is great for data science.")
-        await store.store("What is Rust?", "Rust is a systems programming language.")
+        await memory_store.store("What is JavaScript?", "JS is a web scripting language.")
+        await memory_store.store("What is Python?", "Python is great for data science.")
+        await memory_store.store("What is Rust?", "Rust is a systems programming language.")
 
         # Query should return relevant results
-        result = await store.retrieve("Tell me about programming languages")
+        result = await memory_store.retrieve("Tell me about programming languages")
         assert result != ""
         # Should have multiple memory chunks
         assert "[Memory" in result
+
+
+class TestProximityCache:
+    def test_exact_and_near_hits(self):
+        pytest.importorskip("numpy")
+        from openagent.memory.proximity import ProximityCache
+
+        cache = ProximityCache(capacity=4, tau=0.1)
+        cache.insert("what is rust?", [1.0, 0.0, 0.0], "CTX")
+
+        assert cache.get_exact("what is rust?") == "CTX"
+        assert cache.get_exact("what is rust") is None
+        # Nearly parallel embedding → approximate hit; orthogonal → miss
+        assert cache.lookup([0.99, 0.05, 0.0]) == "CTX"
+        assert cache.lookup([0.0, 1.0, 0.0]) is None
+
+    def test_lru_eviction_and_invalidation(self):
+        pytest.importorskip("numpy")
+        from openagent.memory.proximity import ProximityCache
+
+        cache = ProximityCache(capacity=2, tau=0.1)
+        cache.insert("a", [1.0, 0.0], "A")
+        cache.insert("b", [0.0, 1.0], "B")
+        cache.get_exact("a")                 # "b" is now least recently used
+        cache.insert("c", [-1.0, 0.0], "C")
+        assert cache.get_exact("b") is None
+        assert cache.get_exact("a") == "A"
+
+        # A new document near "a" invalidates it but leaves "c" alone
+        cache.invalidate_near([[1.0, 0.1]], radius=0.5)
+        assert cache.get_exact("a") is None
+        assert cache.get_exact("c") == "C"
@@ -70,24 +70,16 @@ class TestUnifiedParser:
 # ─── DOCX Parser (requires python-docx) ───────────────────────
 
 class TestDocxParser:
-    def test_basic_docx(self, tmp_path):
-        """Create a minimal DOCX and parse it."""
-        from docx import Document
+    def test_basic_docx(self, sample_docx):
+        """Parse the minimal DOCX from conftest."""
         from openagent.parsers import docx_parser
 
-        doc = Document()
-        doc.add_paragraph("First paragraph.")
-        doc.add_paragraph("Second paragraph.")
-
-        f = tmp_path / "test.docx"
-        doc.save(str(f))
-
-        result = docx_parser.extract_text(f)
+        result = docx_parser.extract_text(sample_docx)
         assert "First paragraph." in result
         assert "Second paragraph." in result
 
     def test_docx_with_table(self, tmp_path):
-        from docx import Document
+        Document = pytest.importorskip("docx").Document
         from openagent.parsers import docx_parser
 
         doc = Document()
@@ -113,20 +105,11 @@ class TestDocxParser:
 # ─── PDF Parser (requires PyMuPDF) ────────────────────────────
 
 class TestPdfParser:
-    def test_basic_pdf(self, tmp_path):
-        """Create a minimal PDF with PyMuPDF and parse it back."""
-        import fitz
+    def test_basic_pdf(self, sample_pdf):
+        """Parse the minimal PDF (built with PyMuPDF in conftest) back."""
         from openagent.parsers import pdf_parser
 
-        doc = fitz.open()
-        page = doc.new_page(width=612, height=792)
-        page.insert_text((72, 72), "Hello from a test PDF.", fontsize=12)
-
-        f = tmp_path / "test.pdf"
-        doc.save(str(f))
-        doc.close()
-
-        result = pdf_parser.extract_text(f)
+        result = pdf_parser.extract_text(sample_pdf)
         assert "Hello from a test PDF." in result
 
     def test_pdf_not_found(self):
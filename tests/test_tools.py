@@ -18,6 +18,15 @@ class TestRouter:
         assert tool == ToolName.PARSE_FILE
         assert "filepath" in ctx
 
+    @pytest.mark.asyncio
+    async def test_file_tag_wins_over_path_text_before_it(self, tmp_path):
+        # The web UI sends "<user text>: [FILE:<path>]"
+        f = tmp_path / "doc.pdf"
+        f.write_bytes(b"%PDF-1.4")
+        tool, ctx = await route(f"put it in /tmp/outdir after reading [FILE:{f}]")
+        assert tool == ToolName.PARSE_FILE
+        assert ctx["filepath"] == f
+
     @pytest.mark.asyncio
     async def test_routes_search_keywords(self):
         # We can't guarantee online status in tests, but we can check routing logic
@@ -46,6 +55,12 @@ class TestRouter:
         tool, ctx = await route("what is the meaning of life?")
         assert tool == ToolName.GENERAL
 
+    @pytest.mark.asyncio
+    async def test_routes_greeting(self):
+        tool, ctx = await route("  Thanks! ")
+        assert tool == ToolName.GENERAL
+        assert ctx == {"prompt": "Thanks!"}
+
     @pytest.mark.asyncio
     async def test_routes_ocr_keywords(self):
         tool, ctx = await route("ocr this image please")
@@ -74,3 +89,15 @@ class TestSandboxValidation:
     def test_sandbox_is_enabled_by_default(self):
         from openagent.config import settings
         assert settings.sandbox.enabled is True
+
+
+# ─── File Search Tests ────────────────────────────────────────
+
+class TestFileSearch:
+    def test_line_numbers_follow_splitlines(self, tmp_path):
+        from openagent.tools.offline import file_ops
+        (tmp_path / "notes.txt").write_bytes(b"alpha\x0c\nbeta\rgamma needle\r\nneedle again\n")
+        file_ops.set_project_path(str(tmp_path))
+        result = file_ops.search_in_files("needle")
+        assert "line 4: `gamma needle`" in result
+        assert "line 5: `needle again`" in result
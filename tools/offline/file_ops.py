@@ -12,18 +12,31 @@ SEARCH: Project path only.
 
 from __future__ import annotations
 import os
+import itertools
 import logging
+import mmap
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterator
 
 logger = logging.getLogger("openagent.tools.file_ops")
 
 MAX_READ_SIZE = 36_700_160   # ~35MB max per file read
 MAX_LIST_DEPTH = 3
 MAX_LIST_FILES = 100
+MAX_SEARCH_FILES = 200
+MAX_SEARCH_RESULTS = 30
+
+# Line breaks str.splitlines() honours besides \n and \r\n (UTF-8 encoded).
+# Files containing one are numbered by splitlines() rather than by \n.
+_ODD_LINE_BREAK_RE = re.compile(rb"\r(?!\n)|[\x0b\x0c\x1c-\x1e]|\xc2\x85|\xe2\x80[\xa8\xa9]")
 
 _project_path: str = ""
 
+# Directories never descended into by list_files / search_in_files
+_SKIP_DIRS = frozenset({'__pycache__', 'node_modules', '.git', 'venv', '.venv'})
+
 
 def set_project_path(path: str):
     """Set the project path (called from server.py when settings are updated)."""
@@ -36,15 +49,20 @@ def get_project_path() -> str:
     return _project_path
 
 
+# Absolute paths in free text; a Windows path anywhere wins over a Unix one
+_WIN_PATH_RE = re.compile(r'([A-Za-z]:\\[^\s\'"<>|]+)')
+_UNIX_PATH_RE = re.compile(r'(/[^\s\'"<>|]+)')
+
+
 def extract_path_from_text(text: str) -> str | None:
     """Try to extract a file path from user text."""
     # Match Windows absolute paths like C:\path\to\file.ext
-    win_match = re.search(r'([A-Za-z]:\\[^\s\'"<>|]+)', text)
+    win_match = _WIN_PATH_RE.search(text)
     if win_match:
         return win_match.group(1).strip()
 
     # Match Unix absolute paths like /home/user/file.ext
-    unix_match = re.search(r'(/[^\s\'"<>|]+)', text)
+    unix_match = _UNIX_PATH_RE.search(text)
     if unix_match:
         return unix_match.group(1).strip()
 
@@ -143,16 +161,19 @@ def list_files(directory: str = "") -> str:
     result = [f"📂 **{target.name or target}/**\n"]
     count = 0
 
-    def walk(p: Path, depth: int, prefix: str):
+    def walk(p: str | Path, depth: int, prefix: str):
         nonlocal count
         if depth > MAX_LIST_DEPTH or count > MAX_LIST_FILES:
             return
+        # scandir's DirEntry caches the file type from the directory read,
+        # so is_dir() needs no extra stat() per entry
         try:
-            entries = sorted(p.iterdir(), key=lambda x: (not x.is_dir(), x.name.lower()))
+            with os.scandir(p) as it:
+                entries = sorted(it, key=lambda e: (not e.is_dir(), e.name.lower()))
         except PermissionError:
             return
         for entry in entries:
-            if entry.name.startswith('.') or entry.name in ('__pycache__', 'node_modules', '.git', 'venv', '.venv'):
+            if entry.name.startswith('.') or entry.name in _SKIP_DIRS:
                 continue
             count += 1
             if count > MAX_LIST_FILES:
@@ -160,7 +181,7 @@ def list_files(directory: str = "") -> str:
                 return
             if entry.is_dir():
                 result.append(f"{prefix}📁 {entry.name}/\n")
-                walk(entry, depth + 1, prefix + "  ")
+                walk(entry.path, depth + 1, prefix + "  ")
             else:
                 size = entry.stat().st_size
                 result.append(f"{prefix}📄 {entry.name} ({_human_size(size)})\n")
@@ -187,31 +208,44 @@ def search_in_files(query: str, directory: str = "", extensions: list[str] = Non
 
     if not extensions:
         extensions = ['.py', '.js', '.ts', '.html', '.css', '.yaml', '.yml', '.json', '.txt', '.md', '.java', '.cpp', '.c', '.h']
+    ext_tuple = tuple(extensions)  # str.endswith(tuple) checks all suffixes in C
 
-    results = []
-    file_count = 0
+    query_lower = query.lower()
+    # ASCII queries are matched on the raw bytes (ASCII case folding is
+    # the same in bytes and str); others need the decoded text
+    needle = re.compile(re.escape(query_lower.encode("ascii")), re.IGNORECASE) if query_lower.isascii() else None
 
+    candidates: list[Path] = []
     for root, dirs, files in os.walk(target):
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ('__pycache__', 'node_modules', 'venv', '.venv')]
+        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in _SKIP_DIRS]
         for fname in files:
-            if not any(fname.endswith(ext) for ext in extensions):
-                continue
-            fpath = Path(root) / fname
-            file_count += 1
-            if file_count > 200:
-                break
-            try:
-                content = fpath.read_text(encoding='utf-8', errors='replace')
-                lines = content.splitlines()
-                for i, line in enumerate(lines, 1):
-                    if query.lower() in line.lower():
-                        rel = fpath.relative_to(project)
-                        results.append(f"  `{rel}` line {i}: `{line.strip()[:120]}`")
-                        if len(results) > 30:
-                            results.append("  ... (more results truncated)")
-                            return f"🔍 Search results for '{query}':\n\n" + "\n".join(results)
-            except Exception:
-                continue
+            if fname.endswith(ext_tuple):
+                candidates.append(Path(root) / fname)
+        if len(candidates) >= MAX_SEARCH_FILES:
+            del candidates[MAX_SEARCH_FILES:]
+            break
+
+    def scan(fpath: Path) -> list[str]:
+        try:
+            rel = fpath.relative_to(project)
+            hits = itertools.islice(_matching_lines(fpath, query_lower, needle), MAX_SEARCH_RESULTS + 1)
+            return [f"  `{rel}` line {i}: `{line.strip()[:120]}`" for i, line in hits]
+        except Exception:
+            return []
+
+    # Files are scanned concurrently (reads and mmap scans release the
+    # GIL); map() still yields them in walk order, so output is stable
+    results = []
+    pool = ThreadPoolExecutor(max_workers=min(16, len(candidates) or 1), thread_name_prefix="openagent-search")
+    try:
+        for hits in pool.map(scan, candidates):
+            for hit in hits:
+                results.append(hit)
+                if len(results) > MAX_SEARCH_RESULTS:
+                    results.append("  ... (more results truncated)")
+                    return f"🔍 Search results for '{query}':\n\n" + "\n".join(results)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
     if not results:
         return f"🔍 No results found for '{query}' in {target}"
@@ -219,6 +253,49 @@ def search_in_files(query: str, directory: str = "", extensions: list[str] = Non
     return f"🔍 Search results for '{query}':\n\n" + "\n".join(results)
 
 
+def _matching_lines(fpath: Path, query_lower: str, needle: re.Pattern | None) -> Iterator[tuple[int, str]]:
+    """
+    Yield (line number, line) for each line of the file containing the
+    query, case-insensitively. With a bytes `needle` the file is scanned
+    through mmap and only the matching lines are decoded.
+    """
+    if needle is None:
+        content = fpath.read_text(encoding='utf-8', errors='replace')
+        yield from _split_matching_lines(content, query_lower)
+        return
+
+    if fpath.stat().st_size == 0:  # mmap can't map an empty file
+        return
+    with open(fpath, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        m = needle.search(mm)
+        if m is None:
+            return
+        if _ODD_LINE_BREAK_RE.search(mm) is not None:
+            # \r, \f, U+2028...: splitlines() line numbers, like the decode path
+            yield from _split_matching_lines(mm[:].decode('utf-8', errors='replace'), query_lower)
+            return
+        size = len(mm)
+        line_no, counted = 1, 0
+        while m is not None:
+            start = mm.rfind(b"\n", 0, m.start()) + 1
+            end = mm.find(b"\n", m.start())
+            if end == -1:
+                end = size
+            line_no += mm[counted:start].count(b"\n")
+            counted = start
+            # Drop the \r of a \r\n ending, as splitlines() does
+            stop = end - 1 if end > start and mm[end - 1] == 0x0D else end
+            yield line_no, mm[start:stop].decode('utf-8', errors='replace')
+            m = needle.search(mm, end + 1) if end + 1 < size else None
+
+
+def _split_matching_lines(content: str, query_lower: str) -> Iterator[tuple[int, str]]:
+    """(line number, line) for each str.splitlines() line containing the query."""
+    for i, line in enumerate(content.splitlines(), 1):
+        if query_lower in line.lower():
+            yield i, line
+
+
 def _guess_lang(p: Path) -> str:
     ext_map = {'.py': 'python', '.js': 'javascript', '.ts': 'typescript', '.html': 'html',
                '.css': 'css', '.yaml': 'yaml', '.yml': 'yaml', '.json': 'json',
@@ -18,21 +18,37 @@ Example:
   User: "run command: echo hello world"
   → LLM extracts: ["echo", "hello", "world"]
   → Whitelist check: "echo" is allowed ✅
-  → Execute: subprocess.run(["echo", "hello", "world"])
+  → Execute: asyncio.create_subprocess_exec("echo", "hello", "world")
   → Returns: "hello world"
 """
 
 from __future__ import annotations
-import subprocess
+import asyncio
 import shlex
 import logging
 import json
+import re
 
 from openagent.config import settings
-from openagent.core.llm import LLMClient
+from openagent.core.llm import LLMClient, _json_loads
 
 logger = logging.getLogger("openagent.tools.run_command")
 
+# Whitelist as a set (O(1) lookups), built from settings.yaml
+_ALLOWED: frozenset[str] = frozenset()
+
+
+def reload_allowed_commands() -> None:
+    """Rebuild the whitelist from settings (call after settings change)."""
+    global _ALLOWED
+    _ALLOWED = frozenset(c.lower().strip() for c in settings.sandbox.allowed_commands)
+
+
+reload_allowed_commands()
+
+# The JSON array inside the LLM reply (ignores code fences and chatter around it)
+_JSON_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
+
 EXTRACT_CMD_SYSTEM = """You are a command parser. The user wants to run a shell command.
 Extract EXACTLY the command and its arguments from the user's message.
 Return ONLY a JSON array of strings. Example: ["echo", "hello", "world"]
@@ -56,9 +72,10 @@ async def run_sandboxed_command(user_prompt: str, llm: LLMClient) -> str:
     raw_json = await llm.generate(user_prompt, system=EXTRACT_CMD_SYSTEM)
 
     try:
-        # Strip any markdown code fences the LLM might add
-        cleaned = raw_json.strip().strip("`").replace("json", "").strip()
-        cmd_parts: list[str] = json.loads(cleaned)
+        match = _JSON_ARRAY_RE.search(raw_json)
+        if not match:
+            raise ValueError("No JSON array in LLM output")
+        cmd_parts: list[str] = _json_loads(match.group(0))
         if not isinstance(cmd_parts, list) or not all(isinstance(x, str) for x in cmd_parts):
             raise ValueError("Expected a JSON array of strings")
     except (json.JSONDecodeError, ValueError) as e:
@@ -71,7 +88,7 @@ async def run_sandboxed_command(user_prompt: str, llm: LLMClient) -> str:
     # ── Step 2: Whitelist validation ─────────────────────────
     base_command = cmd_parts[0].lower().strip()
 
-    if base_command not in sandbox_cfg.allowed_commands:
+    if base_command not in _ALLOWED:
         allowed = ", ".join(sandbox_cfg.allowed_commands)
         return (
             f"🚫 Command '{base_command}' is not allowed.\n"
@@ -82,25 +99,34 @@ async def run_sandboxed_command(user_prompt: str, llm: LLMClient) -> str:
     # ── Step 3: Execute with timeout ─────────────────────────
     logger.info(f"Executing sandboxed command: {cmd_parts}")
 
+    # The child runs without blocking the event loop (no worker thread)
     try:
-        result = subprocess.run(
-            cmd_parts,
-            capture_output=True,
-            text=True,
-            timeout=sandbox_cfg.max_execution_seconds,
-            shell=False,                  # CRITICAL: no shell injection
+        proc = await asyncio.create_subprocess_exec(
+            *cmd_parts,                   # exec, never a shell: no shell injection
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
             # Don't run as root; inherits current user
         )
-
-        output = result.stdout.strip()
-        errors = result.stderr.strip()
-
-        if result.returncode != 0:
-            return f"⚠️ Command exited with code {result.returncode}.\nStderr: {errors}"
+        try:
+            out, err = await asyncio.wait_for(
+                proc.communicate(), timeout=sandbox_cfg.max_execution_seconds
+            )
+        finally:
+            # Timeout, cancellation (Ctrl+C, client disconnect), any
+            # error: never leave the child running as an orphan
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+
+        output = out.decode("utf-8", errors="replace").strip()
+        errors = err.decode("utf-8", errors="replace").strip()
+
+        if proc.returncode != 0:
+            return f"⚠️ Command exited with code {proc.returncode}.\nStderr: {errors}"
 
         return f"✅ Output:\n{output}" if output else "✅ Command completed (no output)."
 
-    except subprocess.TimeoutExpired:
+    except asyncio.TimeoutError:
         return (
             f"⏰ Command timed out after {sandbox_cfg.max_execution_seconds}s. "
             f"Increase sandbox.max_execution_seconds in settings.yaml if needed."
@@ -17,6 +17,10 @@ from __future__ import annotations
 import logging
 import asyncio
 import re
+import threading
+import time
+from collections import OrderedDict
+from html import unescape
 
 import requests
 from bs4 import BeautifulSoup
@@ -31,9 +35,61 @@ _USER_AGENT = (
     "https://github.com/openagent) — open-source AI agent"
 )
 
+# ── Shared HTTP session ─────────────────────────────────────────
+# Keep-alive connections are reused across fetches (no new TCP/TLS
+# handshake per call to the same host). Used only for page fetches, so
+# the User-Agent is set once on the session.
+_session = requests.Session()
+_session.headers["User-Agent"] = _USER_AGENT
+_adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=8)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
+# lxml's C parser when installed (several times faster than the pure-
+# Python html.parser). The whole document is parsed either way, so the
+# <title> and any text after a stray </body> are kept.
+try:
+    import lxml  # noqa: F401
+    _HTML_PARSER = "lxml"
+except ImportError:  # optional speedup
+    _HTML_PARSER = "html.parser"
+
 # Tags to strip (scripts, styles, nav cruft)
 _STRIP_TAGS = {"script", "style", "nav", "footer", "header", "aside", "noscript", "iframe"}
 
+# ── Fetched-page cache (LRU + TTL) ──────────────────────────────
+# Agent retries and follow-up questions often hit the same URL again
+# within minutes; reuse the extracted text instead of re-downloading and
+# re-parsing. Only successful extractions are cached.
+_CACHE_MAX = 128
+_CACHE_TTL_SECONDS = 300.0
+_cache_lock = threading.Lock()
+_cache: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+
+def _cache_get(url: str) -> str | None:
+    with _cache_lock:
+        entry = _cache.get(url)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] >= _CACHE_TTL_SECONDS:
+            del _cache[url]
+            return None
+        _cache.move_to_end(url)
+        return entry[1]
+
+
+def _cache_put(url: str, text: str) -> None:
+    with _cache_lock:
+        _cache[url] = (time.monotonic(), text)
+        _cache.move_to_end(url)
+        while len(_cache) > _CACHE_MAX:
+            _cache.popitem(last=False)
+
+
+# A line break plus all whitespace around it (blank lines included)
+_COLLAPSE = re.compile(r"\s*\n\s*")
+
 
 async def web_fetch(url: str) -> str:
     """
@@ -54,12 +110,16 @@ async def web_fetch(url: str) -> str:
 
 def _do_fetch(url: str) -> str:
     """Blocking HTTP fetch — runs in thread pool."""
+    cached = _cache_get(url)
+    if cached is not None:
+        logger.info(f"Fetch cache hit: {url}")
+        return cached
+
     timeout = settings.search.timeout_seconds
 
     try:
-        resp = requests.get(
+        resp = _session.get(
             url,
-            headers={"User-Agent": _USER_AGENT},
             timeout=timeout,
             allow_redirects=True,
         )
@@ -70,7 +130,9 @@ def _do_fetch(url: str) -> str:
         if "text/html" not in content_type and "application/xhtml" not in content_type:
             return f"[Non-HTML content type: {content_type}. Cannot extract text.]"
 
-        return _extract_text(resp.text)
+        text = _extract_text(resp.text)
+        _cache_put(url, text)
+        return text
 
     except requests.exceptions.Timeout:
         return f"[Fetch timed out after {timeout}s. The page may be too slow.]"
@@ -94,7 +156,13 @@ def _extract_text(html: str) -> str:
       4. Collapse whitespace
       5. Remove empty lines
     """
-    soup = BeautifulSoup(html, "html.parser")
+    # Empty or markup-free body (health checks, stubs): nothing to parse
+    if "<" not in html:
+        # Entities are still decoded, as BeautifulSoup would
+        clean = _COLLAPSE.sub("\n", unescape(html)).strip()
+        return clean or "[Page loaded but no readable text was found. It may be JS-rendered.]"
+
+    soup = BeautifulSoup(html, _HTML_PARSER)
 
     # Remove noise tags
     for tag in soup.find_all(_STRIP_TAGS):
@@ -103,14 +171,8 @@ def _extract_text(html: str) -> str:
     # Extract text
     text = soup.get_text(separator="\n")
 
-    # Clean up whitespace
-    lines = []
-    for line in text.split("\n"):
-        stripped = line.strip()
-        if stripped:
-            lines.append(stripped)
-
-    clean = "\n".join(lines)
+    # Strip every line and drop empty ones, in one C-level pass
+    clean = _COLLAPSE.sub("\n", text).strip()
 
     if not clean:
         return "[Page loaded but no readable text was found. It may be JS-rendered.]"
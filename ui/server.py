@@ -28,10 +28,9 @@ sys.path.insert(0, str(Path(__file__).resolve().parent))
 os.chdir(project_root)
 
 # Now import from the project
-from openagent.core.agent import Agent, SYSTEM_PROMPT
+from openagent.core.agent import Agent, InterruptedReply
 from openagent.core.network import check_connectivity
-from openagent.core.llm import LLMClient
-from openagent.core.router import route
+from openagent.core.llm import LLMClient, Turn
 
 app = Flask(__name__, static_folder='.')
 app.config['MAX_CONTENT_LENGTH'] = 36 * 1024 * 1024  # 36 MB max upload size
@@ -70,9 +69,18 @@ def run_async(coro, timeout: float | None = 300):
     return asyncio.run_coroutine_threadsafe(coro, _async_loop).result(timeout)
 
 
+# run_async() needs real coroutines; async-generator steps aren't.
+async def _anext(agen):
+    return await agen.__anext__()
+
+
+async def _aclose(agen):
+    await agen.aclose()
+
+
 # Global agent instance
 agent_instance = None
-conversation_sessions = {}  # Map session_id -> list of messages
+conversation_sessions = {}  # Map session_id -> list of Turn records
 _agent_init_lock: asyncio.Lock | None = None  # Created lazily on the shared loop
 
 
@@ -173,8 +181,8 @@ def chat():
             response = await agent.run(user_message, history)
             
             # Update conversation history
-            history.append({"role": "user", "content": user_message})
-            history.append({"role": "assistant", "content": response})
+            history.append(Turn("user", user_message))
+            history.append(Turn("assistant", response))
             
             # Trim history to last 40 messages
             if len(history) > 40:
@@ -221,66 +229,36 @@ def chat_stream():
             import json as _json
             history = conversation_sessions[session_id]
 
-            # Async prep runs on the shared background loop; the token
-            # loop itself (agent.llm.stream_generate) is a plain sync
-            # generator that runs right here in the Flask thread.
+            # The agent's streaming pipeline (concurrent memory retrieval +
+            # routing, token streaming for prompt-only tools, one chunk for
+            # the rest, background memory store) lives on the shared
+            # background loop; this Flask thread pulls one token at a time.
             agent = run_async(get_agent())
-
-            # Route the message
-            tool_name, ctx = run_async(route(user_message))
-
-            # For GENERAL chat, use streaming directly
-            from openagent.core.router import ToolName
-            if tool_name == ToolName.GENERAL:
-                # Build prompt same way as agent does
-                from openagent.core.agent import Agent as AgentClass
-                memory_ctx = ""
-                if not AgentClass._is_simple_query(user_message):
-                    memory_ctx = run_async(agent.memory.retrieve(user_message))
-
-                prompt = AgentClass._build_prompt(ctx["prompt"], memory_ctx)
-                offline_warning = ctx.get("offline_warning", "")
-                if offline_warning:
-                    prompt = f"[NOTE: {offline_warning}]\n\n" + prompt
-
-                full_response = []
-                for token in agent.llm.stream_generate(prompt, system=SYSTEM_PROMPT, history=history):
+            tokens = agent.run_stream(user_message, history)
+
+            full_response = []
+            try:
+                while True:
+                    try:
+                        token = run_async(_anext(tokens))
+                    except StopAsyncIteration:
+                        break
                     full_response.append(token)
                     yield f"data: {_json.dumps({'token': token})}\n\n"
+            finally:
+                # Client disconnects close this generator early; close the
+                # agent stream too so its worker stops (an abandoned reply
+                # is not stored to memory).
+                run_async(_aclose(tokens))
 
-                complete = "".join(full_response)
-            elif tool_name == ToolName.WEB_SEARCH:
-                # For web search: do the search, then stream the LLM synthesis
-                from openagent.tools.online.web_search import web_search
-                from openagent.core.agent import Agent as AgentClass
-                memory_ctx = ""
-                if not AgentClass._is_simple_query(user_message):
-                    memory_ctx = run_async(agent.memory.retrieve(user_message))
-                search_results = run_async(web_search(ctx.get("query", ctx["prompt"])))
-                prompt = AgentClass._build_prompt(ctx["prompt"], memory_ctx, web_results=search_results)
-
-                full_response = []
-                for token in agent.llm.stream_generate(prompt, system=SYSTEM_PROMPT, history=history):
-                    full_response.append(token)
-                    yield f"data: {_json.dumps({'token': token})}\n\n"
-
-                complete = "".join(full_response)
-            else:
-                # For tool-based routes, run the full agent (non-streaming) and send as one chunk
-                # (agent.run already queues its own background memory store)
-                complete = run_async(agent.run(user_message, history))
-                yield f"data: {_json.dumps({'token': complete})}\n\n"
-
-            # Update session history
-            history.append({"role": "user", "content": user_message})
-            history.append({"role": "assistant", "content": complete})
-            if len(history) > 40:
-                conversation_sessions[session_id] = history[-40:]
+            complete = "".join(full_response)
 
-            # Store in memory without delaying the final SSE event
-            # (skip for tool routes — agent.run stored it already)
-            if tool_name in (ToolName.GENERAL, ToolName.WEB_SEARCH):
-                agent.memory.store_background(user_message, complete)
+            # Update session history (a reply cut off mid-answer is left out)
+            if not (full_response and isinstance(full_response[-1], InterruptedReply)):
+                history.append(Turn("user", user_message))
+                history.append(Turn("assistant", complete))
+                if len(history) > 40:
+                    conversation_sessions[session_id] = history[-40:]
 
             yield f"data: {_json.dumps({'done': True})}\n\n"
 
@@ -414,8 +392,8 @@ def analyze_image():
             response = await agent.run(user_msg, history)
 
             # Update conversation history
-            history.append({"role": "user", "content": f"[Uploaded image: {file.filename}]"})
-            history.append({"role": "assistant", "content": response})
+            history.append(Turn("user", f"[Uploaded image: {file.filename}]"))
+            history.append(Turn("assistant", response))
 
             if len(history) > 40:
                 conversation_sessions[session_id] = history[-40:]
@@ -444,7 +422,9 @@ def update_settings():
     project_path = data.get('project_path', '')
 
     from openagent.tools.offline.file_ops import set_project_path
+    from openagent.tools.offline.run_command import reload_allowed_commands
     set_project_path(project_path)
+    reload_allowed_commands()
 
     return jsonify({'status': 'success', 'project_path': project_path})
 